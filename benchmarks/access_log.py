@@ -0,0 +1,116 @@
+"""Access log: requests/sec through the full middleware stack to the demo
+``/`` route, without an access log, with the pure ASGI one and with the
+BaseHTTPMiddleware hook it replaced.
+
+Log lines go to /dev/null, so only the cost inside the process is measured.
+Needs no database or Redis::
+
+    PYTHONPATH=. python benchmarks/access_log.py --requests 20000
+"""
+
+from src import app
+from src.middleware import AccessLogMiddleware, access_log_writer
+from contextlib import redirect_stdout
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+import argparse
+import asyncio
+import os
+import time
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/api/v1/demo/",
+    "raw_path": b"/api/v1/demo/",
+    "query_string": b"",
+    "root_path": "",
+    "headers": [(b"host", b"bench")],
+    "client": ("127.0.0.1", 50000),
+    "server": ("bench", 80),
+}
+# as registered, with the access log in its usual place
+MIDDLEWARE = list(app.user_middleware)
+
+
+async def custom_logging(request, call_next):
+    # the hook as it was before the pure ASGI middleware
+    start_time = time.time()
+    response = await call_next(request)
+    processing_time = time.time() - start_time
+    message = f"{request.client.host}:{request.client.port} - {request.method} - {request.url.path} - {response.status_code} - completed after {processing_time}s"
+    print(message)
+
+    return response
+
+
+def use_access_log(middleware) -> None:
+    app.user_middleware = []
+    for m in MIDDLEWARE:
+        if m.cls is AccessLogMiddleware:
+            m = middleware
+        if m is not None:
+            app.user_middleware.append(m)
+    # rebuilt on the next call
+    app.middleware_stack = None
+
+
+async def request() -> None:
+    received = False
+
+    async def receive():
+        nonlocal received
+        if received:
+            # a client that stays connected until the response is sent
+            await asyncio.Event().wait()
+        received = True
+
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message
+
+    await app(dict(SCOPE), receive, send)
+
+
+async def requests_per_second(count: int, concurrency: int) -> float:
+    async def client(n: int) -> None:
+        for _ in range(n):
+            await request()
+
+    await client(100)
+    started = time.perf_counter()
+    await asyncio.gather(*[client(count // concurrency) for _ in range(concurrency)])
+
+    return count // concurrency * concurrency / (time.perf_counter() - started)
+
+
+async def main(count: int, concurrency: int) -> None:
+    variants = {
+        "no access log": None,
+        "pure ASGI": Middleware(AccessLogMiddleware),
+        "BaseHTTPMiddleware": Middleware(BaseHTTPMiddleware, dispatch=custom_logging),
+    }
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        access_log_writer.stream = devnull
+        access_log_writer.start()
+        results = {}
+        for name, middleware in variants.items():
+            use_access_log(middleware)
+            results[name] = await requests_per_second(count, concurrency)
+        access_log_writer.stop()
+
+    for name, rate in results.items():
+        print(f"{name:<21} {rate:8.0f} requests/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,170 @@
+"""Facet counts: p95 of an uncached get_facet_counts per kind of filter on a
+catalogue of millions of books, against the GROUP BY over book it replaces.
+
+Seeds ``--books`` books into the database at ``DATABASE_URL`` (use a
+scratch database; the rows are deleted again afterwards) and uses the Redis
+at ``REDIS_URL``, then runs::
+
+    PYTHONPATH=. python benchmarks/facets.py --books 2000000
+"""
+
+from src.books.facets import (
+    BOOK_FACET_COLUMNS,
+    FACETS_GENERATION,
+    facet_cache,
+    get_facet_counts,
+    refresh_facets,
+)
+from src.config import Config
+from src.db.main import async_engine, async_session_maker, init_db
+from src.db.models import FACET_SCOPES, Book
+from src.db.pubsub import pubsub_client
+from src.db.redis import redis_client
+from sqlmodel import select
+from sqlalchemy import desc, func, text
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+SEED_BATCH_SIZE = 200_000
+
+# skewed like a real catalogue: a few big languages and publishers, and a
+# long tail of authors with a handful of books each
+SEED_BOOKS = """
+INSERT INTO book (id, title, author, publisher, published_date, page_count,
+                  language, created_at, updated_at)
+SELECT 'bench-' || g, 'Title ' || g,
+       'Author ' || (random() * 400000)::int,
+       'Publisher ' || (random() ^ 3 * 5000)::int,
+       date '1900-01-01' + (random() ^ 0.5 * 45000)::int,
+       100 + (random() * 500)::int,
+       (ARRAY['en', 'en', 'en', 'en', 'en', 'fr', 'de', 'es', 'it', 'ja'])
+           [1 + (random() * 9)::int],
+       now(), now()
+FROM generate_series(CAST(:start AS int), CAST(:stop AS int)) g
+"""
+
+
+async def seed(count: int) -> None:
+    for start in range(0, count, SEED_BATCH_SIZE):
+        stop = min(start + SEED_BATCH_SIZE, count)
+        async with async_engine.begin() as conn:
+            await conn.execute(text(SEED_BOOKS), {"start": start + 1, "stop": stop})
+    async with async_engine.connect() as conn:
+        await conn.execute(text("ANALYZE book"))
+
+
+async def sample(column, count: int) -> list:
+    statement = (
+        select(column)
+        .where(Book.id.startswith("bench-"))
+        .group_by(column)
+        .order_by(func.random())
+        .limit(count)
+    )
+    async with async_session_maker() as session:
+        result = await session.exec(statement)
+
+        return list(result.all())
+
+
+async def filter_kinds() -> dict:
+    languages = await sample(Book.language, 10)
+    publishers = await sample(Book.publisher, 50)
+    authors = await sample(Book.author, 50)
+    decades = list(range(1900, 2030, 10))
+
+    return {
+        "none": lambda: {},
+        "language": lambda: {"language": random.choice(languages)},
+        "decade": lambda: {"decade": random.choice(decades)},
+        "language+decade": lambda: {
+            "language": random.choice(languages),
+            "decade": random.choice(decades),
+        },
+        "publisher": lambda: {"publisher": random.choice(publishers)},
+        "publisher+decade": lambda: {
+            "publisher": random.choice(publishers),
+            "decade": random.choice(decades),
+        },
+        "author": lambda: {"author": random.choice(authors)},
+        "author+language": lambda: {
+            "author": random.choice(authors),
+            "language": random.choice(languages),
+        },
+    }
+
+
+async def time_facets(filters, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        # a new generation for every call, so none is served from the cache
+        await facet_cache.bump_generation(FACETS_GENERATION)
+        async with async_session_maker() as session:
+            started = time.perf_counter()
+            await get_facet_counts(session, **filters())
+            timings.append((time.perf_counter() - started) * 1e3)
+
+    return timings
+
+
+async def time_group_by(runs: int) -> list:
+    # what every uncached request used to pay: one GROUP BY over book per facet
+    timings = []
+    for _ in range(runs):
+        async with async_session_maker() as session:
+            started = time.perf_counter()
+            for name in FACET_SCOPES:
+                column = BOOK_FACET_COLUMNS[name]
+                book_count = func.count().label("book_count")
+                await session.exec(
+                    select(column, book_count)
+                    .select_from(Book)
+                    .group_by(column)
+                    .order_by(desc(book_count), column)
+                    .limit(Config.BOOK_FACETS_LIMIT)
+                )
+            timings.append((time.perf_counter() - started) * 1e3)
+
+    return timings
+
+
+def summary(timings: list) -> str:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95)]
+
+    return f"median {statistics.median(timings):8.2f} ms, p95 {p95:8.2f} ms"
+
+
+async def main(books: int, runs: int) -> None:
+    await init_db()
+    try:
+        started = time.perf_counter()
+        await seed(books)
+        print(f"seeded books          {books} in {time.perf_counter() - started:.1f} s")
+        async with async_session_maker() as session:
+            started = time.perf_counter()
+            await refresh_facets(session)
+        print(f"view refresh          {time.perf_counter() - started:.1f} s")
+
+        for kind, filters in (await filter_kinds()).items():
+            print(f"{kind:<21} {summary(await time_facets(filters, runs))}")
+        print(f"{'GROUP BY over book':<21} {summary(await time_group_by(5))}")
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.execute(text("DELETE FROM book WHERE id LIKE 'bench-%'"))
+        async with async_session_maker() as session:
+            await refresh_facets(session)
+        await redis_client.aclose()
+        await pubsub_client.aclose()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--books", type=int, default=2_000_000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.books, args.runs))
@@ -0,0 +1,126 @@
+"""Login storm: p99 of a non-auth endpoint while bcrypt logins run
+concurrently, with hashing on the worker pool and on the event loop.
+
+Creates one user in the database at ``DATABASE_URL`` (use a scratch
+database; the user is deleted again afterwards), then runs::
+
+    PYTHONPATH=. python benchmarks/login_storm.py --logins 16
+"""
+
+from src import app
+from src.auth.hashing import password_hasher
+from src.auth.utils import generate_password_hash
+from src.db.main import async_engine, async_session_maker, init_db
+from src.db.models import User
+from concurrent.futures import Executor, Future
+from sqlalchemy import delete
+import argparse
+import asyncio
+import httpx
+import statistics
+import time
+
+EMAIL = "login-storm@example.com"
+PASSWORD = "login-storm-password"
+
+
+class InlineExecutor(Executor):
+    """Runs each call where it is submitted, i.e. bcrypt on the event loop."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+
+        return future
+
+
+async def seed() -> None:
+    async with async_session_maker() as session:
+        session.add(
+            User(
+                username="login-storm",
+                email=EMAIL,
+                first_name="Login",
+                last_name="Storm",
+                is_verified=True,
+                password_hash=generate_password_hash(PASSWORD),
+            )
+        )
+        await session.commit()
+
+
+async def probe(client: httpx.AsyncClient, seconds: float, interval: float) -> list:
+    timings = []
+    scheduled = time.perf_counter()
+    deadline = scheduled + seconds
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(max(0, scheduled - time.perf_counter()))
+        response = await client.get("/api/v1/demo/")
+        # timed from when the request was due, so a blocked loop counts too
+        timings.append((time.perf_counter() - scheduled) * 1e3)
+        assert response.status_code == 200, response.text
+        scheduled += interval
+
+    return timings
+
+
+async def log_in(client: httpx.AsyncClient, stopped: asyncio.Event) -> int:
+    logins = 0
+    while not stopped.is_set():
+        response = await client.post(
+            "/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD}
+        )
+        assert response.status_code == 200, response.text
+        logins += 1
+
+    return logins
+
+
+async def run(client, logins: int, seconds: float, interval: float) -> str:
+    stopped = asyncio.Event()
+    storm = [asyncio.create_task(log_in(client, stopped)) for _ in range(logins)]
+    started = time.perf_counter()
+    try:
+        timings = sorted(await probe(client, seconds, interval))
+    finally:
+        stopped.set()
+        done = sum(await asyncio.gather(*storm))
+    rate = done / (time.perf_counter() - started)
+    p99 = timings[int(len(timings) * 0.99)]
+
+    return (
+        f"median {statistics.median(timings):7.2f} ms, p99 {p99:8.2f} ms "
+        f"over {len(timings):5} requests, {rate:5.1f} logins/s"
+    )
+
+
+async def main(logins: int, seconds: float, interval: float) -> None:
+    await init_db()
+    await seed()
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            print(f"no logins             {await run(client, 0, seconds, interval)}")
+            pooled = await run(client, logins, seconds, interval)
+            print(f"logins on the pool    {pooled}")
+            # what the login route did before bcrypt moved off the loop
+            pool = password_hasher._get_executor()
+            password_hasher._executor = InlineExecutor()
+            inline = await run(client, logins, seconds, interval)
+            print(f"logins on the loop    {inline}")
+            pool.shutdown()
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(User).where(User.email == EMAIL))
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--logins", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--interval", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.seconds, args.interval))
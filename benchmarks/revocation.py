@@ -0,0 +1,89 @@
+"""Token revocation check: false positives, memory, rebuild time and the
+per-request cost of auth with and without the local filter.
+
+Seeds ``--revoked`` revocations into the Redis at ``REDIS_URL`` (use a
+scratch instance; the keys are deleted again afterwards), then runs::
+
+    PYTHONPATH=. python benchmarks/revocation.py --revoked 100000
+"""
+
+from src.auth.utils import create_access_token, decode_token
+from src.db import redis as revocations
+from src.db.revocation import RevocationFilter
+from src.db.pubsub import pubsub_listener
+from src.config import Config
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+
+async def seed(count: int, exp: int) -> None:
+    bucket_key = revocations._bucket_key(exp)
+    for start in range(0, count, 10_000):
+        async with revocations.redis_client.pipeline(transaction=False) as pipe:
+            for i in range(start, min(start + 10_000, count)):
+                pipe.hset(bucket_key, f"revoked-{i}", "")
+            await pipe.execute()
+
+
+async def time_checks(tokens, filtered: bool) -> list:
+    # the filter is only trusted while it is ready and pub/sub is connected
+    revocations.revocation_filter.ready = filtered
+    pubsub_listener.connected = filtered
+    timings = []
+    for token in tokens:
+        started = time.perf_counter()
+        await revocations.token_in_blocklist(decode_token(token))
+        timings.append((time.perf_counter() - started) * 1e6)
+
+    return timings
+
+
+def summary(timings: list) -> str:
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99)]
+
+    return f"median {statistics.median(timings):7.1f} us, p99 {p99:7.1f} us"
+
+
+async def main(revoked: int, checks: int) -> None:
+    exp = int(time.time()) + 3600
+    await seed(revoked, exp)
+    try:
+        revocations.revocation_filter = RevocationFilter(
+            capacity=max(Config.REVOCATION_FILTER_CAPACITY, revoked),
+            error_rate=Config.REVOCATION_FILTER_ERROR_RATE,
+        )
+        await revocations.rebuild_revocation_filter()
+        stats = revocations.revocation_filter.stats()
+
+        probes = [str(uuid.uuid4()) for _ in range(100_000)]
+        false_positives = sum(
+            revocations.revocation_filter.might_contain(jti) for jti in probes
+        )
+
+        print(f"revoked tokens        {stats['entries']}")
+        print(f"filter memory         {stats['memory_bytes'] / 1e6:.2f} MB")
+        print(f"rebuild time          {stats['last_rebuild_seconds']:.3f} s")
+        print(f"estimated fp rate     {stats['false_positive_rate']:.2e}")
+        print(f"measured fp rate      {false_positives / len(probes):.2e}")
+
+        claims = {"id": "bench", "email": "", "role": "user", "is_verified": True}
+        tokens = [create_access_token(claims) for _ in range(checks)]
+        with_filter = await time_checks(tokens, filtered=True)
+        without_filter = await time_checks(tokens, filtered=False)
+        print(f"auth with filter      {summary(with_filter)}")
+        print(f"auth without filter   {summary(without_filter)}")
+    finally:
+        await revocations.redis_client.delete(revocations._bucket_key(exp))
+        await revocations.redis_client.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--revoked", type=int, default=100_000)
+    parser.add_argument("--checks", type=int, default=5_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.revoked, args.checks))
@@ -0,0 +1,150 @@
+"""Full-text search: p95 of BookService.search per kind of query on a
+catalogue of a million books.
+
+Seeds ``--books`` books into the database at ``DATABASE_URL`` (use a
+scratch database; the rows are deleted again afterwards), then runs::
+
+    PYTHONPATH=. python benchmarks/search.py --books 1000000
+"""
+
+from src.books.service import BookService
+from src.db.main import async_engine, async_session_maker, init_db
+from datetime import date
+from sqlalchemy import text
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+SEED_BATCH_SIZE = 100_000
+PAGE_SIZE = 20
+
+WORDS = (
+    "night house river garden shadow letter winter empire secret island "
+    "stone silver mountain daughter city fire ocean journey war queen "
+    "forest wind glass memory road king child storm summer bridge "
+    "kingdom light harbor station machine library mirror orchard valley "
+    "clock tower desert captain widow soldier painter engine signal "
+    "thunder lantern crown meadow prophet sparrow cellar voyage falcon "
+    "archive cathedral compass dynasty ember frontier glacier horizon "
+    "labyrinth monsoon nebula obsidian pilgrim quarry requiem sanctuary "
+    "tempest umbra vesper wilderness zenith almanac bastion chronicle"
+).split()
+NAMES = (
+    "Adams Baker Chen Dubois Evans Fischer Garcia Haddad Ito Jensen Kowalski "
+    "Larsen Moreau Novak Okafor Petrov Quinn Rossi Sato Tanaka Ueda Varga "
+    "Weber Xu Yilmaz Zimmerman"
+).split()
+
+# the first words are far more common than the last, as in real titles
+SEED_BOOKS = """
+WITH vocabulary AS (
+    SELECT CAST(:words AS text[]) AS words, CAST(:names AS text[]) AS names
+)
+INSERT INTO book (id, title, author, publisher, published_date, page_count,
+                  language, created_at, updated_at)
+SELECT 'bench-' || g,
+       initcap(concat_ws(' ',
+           words[1 + (random() ^ 2 * (cardinality(words) - 1))::int],
+           words[1 + (random() ^ 2 * (cardinality(words) - 1))::int],
+           words[1 + (random() * (cardinality(words) - 1))::int])),
+       names[1 + (random() * (cardinality(names) - 1))::int] || ' '
+           || names[1 + (random() * (cardinality(names) - 1))::int],
+       initcap(words[1 + (random() * (cardinality(words) - 1))::int]) || ' Press',
+       date '1900-01-01' + (random() * 45000)::int,
+       100 + (random() * 500)::int,
+       (ARRAY['en', 'en', 'en', 'fr', 'de'])[1 + (random() * 4)::int],
+       now(), now()
+FROM vocabulary, generate_series(CAST(:start AS int), CAST(:stop AS int)) g
+"""
+
+
+async def seed(count: int) -> None:
+    for start in range(0, count, SEED_BATCH_SIZE):
+        stop = min(start + SEED_BATCH_SIZE, count)
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                text(SEED_BOOKS),
+                {"words": WORDS, "names": NAMES, "start": start + 1, "stop": stop},
+            )
+    async with async_engine.connect() as conn:
+        await conn.execute(text("ANALYZE book"))
+
+
+def common_word():
+    return random.choice(WORDS[:10])
+
+
+def uncommon_word():
+    # still in a few percent of the books, as the last title word and publisher
+    return random.choice(WORDS[-20:])
+
+
+QUERY_KINDS = {
+    "common word": lambda: {"q": common_word()},
+    "uncommon word": lambda: {"q": uncommon_word()},
+    "two words": lambda: {"q": f"{common_word()} {uncommon_word()}"},
+    "phrase": lambda: {"q": f'"{common_word()} {common_word()}"'},
+    "author": lambda: {"q": random.choice(NAMES)},
+    "word + language": lambda: {"q": common_word(), "language": "fr"},
+    "word + date range": lambda: {
+        "q": common_word(),
+        "published_from": date(1990, 1, 1),
+        "published_to": date(1999, 12, 31),
+    },
+}
+
+
+async def time_searches(book_service: BookService, query, runs: int, pages: int):
+    timings = []
+    for _ in range(runs):
+        kwargs = query()
+        cursor = None
+        async with async_session_maker() as session:
+            for _ in range(pages):
+                started = time.perf_counter()
+                _, cursor = await book_service.search(
+                    session, limit=PAGE_SIZE, cursor=cursor, **kwargs
+                )
+                elapsed = (time.perf_counter() - started) * 1e3
+                if cursor is None:
+                    break
+            # only the last page's time, so deep pages can be told apart
+            timings.append(elapsed)
+
+    return timings
+
+
+def summary(timings: list) -> str:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95)]
+
+    return f"median {statistics.median(timings):8.2f} ms, p95 {p95:8.2f} ms"
+
+
+async def main(books: int, runs: int) -> None:
+    await init_db()
+    book_service = BookService()
+    try:
+        started = time.perf_counter()
+        await seed(books)
+        print(f"seeded books          {books} in {time.perf_counter() - started:.1f} s")
+
+        for kind, query in QUERY_KINDS.items():
+            timings = await time_searches(book_service, query, runs, pages=1)
+            print(f"{kind:<21} {summary(timings)}")
+        timings = await time_searches(book_service, QUERY_KINDS["common word"], runs, 5)
+        print(f"{'common word, page 5':<21} {summary(timings)}")
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.execute(text("DELETE FROM book WHERE id LIKE 'bench-%'"))
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.books, args.runs))
@@ -0,0 +1,102 @@
+"""Book serialization: time to fetch and encode a page of ``--books`` books
+as BookModel JSON, along each path a list endpoint could take.
+
+Seeds the books into the database at ``DATABASE_URL`` (use a scratch
+database; the rows are deleted again afterwards), then runs::
+
+    PYTHONPATH=. python benchmarks/serialization.py --books 10000
+"""
+
+from src.books.schemas import BookPageModel
+from src.books.service import BOOK_ORDERING, book_projection, select_books
+from src.db.main import async_engine, async_session_maker, init_db
+from src.db.models import Book
+from src.responses import json_response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+from sqlalchemy import text
+import argparse
+import asyncio
+import statistics
+import time
+
+SEED_BOOKS = """
+INSERT INTO book (id, title, author, publisher, published_date, page_count,
+                  language, review_count, rating_sum, created_at, updated_at)
+SELECT 'bench-' || g, 'Title ' || g, 'Author ' || g % 1000,
+       'Publisher ' || g % 100, date '1950-01-01' + g % 20000, 100 + g % 500,
+       'en', g % 7, g % 7 * 3, now(), now()
+FROM generate_series(1, CAST(:count AS int)) g
+"""
+
+
+def timed(runs: int, fn) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1e3)
+
+    return statistics.median(timings)
+
+
+async def fetch(statement, runs: int):
+    timings = []
+    for _ in range(runs):
+        # a fresh session, so every run hydrates its ORM objects anew
+        async with async_session_maker() as session:
+            started = time.perf_counter()
+            rows = (await session.exec(statement.order_by(*BOOK_ORDERING))).all()
+            timings.append((time.perf_counter() - started) * 1e3)
+
+    return rows, statistics.median(timings)
+
+
+async def main(books: int, runs: int) -> None:
+    await init_db()
+    try:
+        async with async_engine.begin() as conn:
+            await conn.execute(text(SEED_BOOKS), {"count": books})
+
+        orm_rows, orm_fetch = await fetch(select_books(None), runs)
+        column_rows, column_fetch = await fetch(
+            select_books(book_projection.fields), runs
+        )
+        page = {"items": orm_rows, "next_cursor": None}
+        models = BookPageModel.model_validate(page, from_attributes=True)
+        fields = book_projection.fields
+
+        print(f"fetch ORM rows                  {orm_fetch:7.1f} ms")
+        print(f"fetch column rows               {column_fetch:7.1f} ms")
+        encodings = {
+            "validate + jsonable_encoder": lambda: JSONResponse(
+                jsonable_encoder(
+                    BookPageModel.model_validate(page, from_attributes=True)
+                )
+            ),
+            "json_response from ORM rows": lambda: json_response(BookPageModel, page),
+            "json_response, trusted model": lambda: json_response(
+                BookPageModel, models, trusted=True
+            ),
+            "column rows as plain dicts": lambda: to_json(
+                {
+                    "items": [book_projection.dump(row, fields) for row in column_rows],
+                    "next_cursor": None,
+                }
+            ),
+        }
+        for name, encode in encodings.items():
+            print(f"{name:<31} {timed(runs, encode):7.1f} ms")
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.execute(text("DELETE FROM book WHERE id LIKE 'bench-%'"))
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--books", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.books, args.runs))
@@ -0,0 +1,20 @@
+import os
+
+# set before anything imports src, whose settings are read at import time;
+# tests always get their own database and never the app's replicas
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", "postgresql+asyncpg://postgres@localhost:5432/bookly_test"
+)
+os.environ["DATABASE_REPLICA_URLS"] = "[]"
+for name, value in {
+    "JWT_SECRET": "test-secret",
+    "JWT_ALGORITHM": "HS256",
+    "MAIL_USERNAME": "bookly",
+    "MAIL_PASSWORD": "bookly",
+    "MAIL_FROM": "bookly@example.com",
+    "MAIL_SERVER": "localhost",
+    "MAIL_FROM_NAME": "Bookly",
+    "DOMAIN": "localhost",
+    "ACCESS_LOG_ENABLED": "false",
+}.items():
+    os.environ.setdefault(name, value)
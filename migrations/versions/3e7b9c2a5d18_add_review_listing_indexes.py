@@ -0,0 +1,35 @@
+"""add review listing indexes
+
+Revision ID: 3e7b9c2a5d18
+Revises: 8f2d4b6a1c07
+Create Date: 2026-10-18 22:48:09.152637
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7b9c2a5d18'
+down_revision: Union[str, None] = '8f2d4b6a1c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_review_book_id_created_at_id', 'review', ['book_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_review_book_id_rating_created_at_id', 'review', ['book_id', 'rating', 'created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        # covered by the leading column of ix_review_book_id_created_at_id
+        op.drop_index('ix_review_book_id', table_name='review', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_review_book_id', 'review', ['book_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_review_book_id_rating_created_at_id', table_name='review', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_review_book_id_created_at_id', table_name='review', postgresql_concurrently=True, if_exists=True)
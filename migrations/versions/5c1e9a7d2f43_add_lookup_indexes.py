@@ -0,0 +1,38 @@
+"""add lookup indexes
+
+Revision ID: 5c1e9a7d2f43
+Revises: 0d39740bea95
+Create Date: 2026-10-18 20:30:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a7d2f43'
+down_revision: Union[str, None] = '0d39740bea95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_user_email', 'user', ['email'], unique=True, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_book_user_id_created_at_id', 'book', ['user_id', 'created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_book_created_at_id', 'book', ['created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_review_book_id', 'review', ['book_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_review_user_id', 'review', ['user_id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_review_user_id', table_name='review', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_review_book_id', table_name='review', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_book_created_at_id', table_name='book', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_book_user_id_created_at_id', table_name='book', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_user_email', table_name='user', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,72 @@
+"""add book search vector
+
+Revision ID: a41c6e8f0b92
+Revises: 3e7b9c2a5d18
+Create Date: 2026-10-18 23:36:57.208114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c6e8f0b92'
+down_revision: Union[str, None] = '3e7b9c2a5d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('simple', {row}title), 'A') || "
+    "setweight(to_tsvector('simple', {row}author), 'B') || "
+    "setweight(to_tsvector('simple', {row}publisher), 'C')"
+)
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    # nullable without a default, so adding it only touches the catalog; a
+    # GENERATED ... STORED column would rewrite the table under ACCESS EXCLUSIVE
+    op.execute("ALTER TABLE book ADD COLUMN IF NOT EXISTS search_vector tsvector")
+    op.execute(
+        "CREATE OR REPLACE FUNCTION book_search_vector_update() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ BEGIN "
+        f"NEW.search_vector := {SEARCH_DOCUMENT.format(row='NEW.')}; "
+        "RETURN NEW; END $$"
+    )
+    op.execute("DROP TRIGGER IF EXISTS book_search_vector_update ON book")
+    op.execute(
+        "CREATE TRIGGER book_search_vector_update "
+        "BEFORE INSERT OR UPDATE OF title, author, publisher ON book "
+        "FOR EACH ROW EXECUTE FUNCTION book_search_vector_update()"
+    )
+    with op.get_context().autocommit_block():
+        # rows written from here on are covered by the trigger; backfill the
+        # rest in short transactions so no row lock is held for long
+        bind = op.get_bind()
+        backfill = sa.text(
+            "WITH batch AS (SELECT id FROM book WHERE id > :after "
+            "ORDER BY id LIMIT :batch_size), updated AS ("
+            f"UPDATE book SET search_vector = {SEARCH_DOCUMENT.format(row='book.')} "
+            "FROM batch WHERE book.id = batch.id RETURNING book.id) "
+            # the last id in the column's own collation
+            "SELECT max(id) FROM updated"
+        )
+        after = ""
+        while after is not None:
+            after = bind.execute(
+                backfill, {"after": after, "batch_size": BACKFILL_BATCH_SIZE}
+            ).scalar()
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+        op.create_index('ix_book_search_vector', 'book', ['search_vector'], unique=False, postgresql_using='gin', postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_book_search_vector', table_name='book', postgresql_concurrently=True, if_exists=True)
+    op.execute("DROP TRIGGER IF EXISTS book_search_vector_update ON book")
+    op.execute("DROP FUNCTION IF EXISTS book_search_vector_update()")
+    op.drop_column('book', 'search_vector')
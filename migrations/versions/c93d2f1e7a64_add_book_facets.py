@@ -0,0 +1,74 @@
+"""add book facets
+
+Revision ID: c93d2f1e7a64
+Revises: a41c6e8f0b92
+Create Date: 2026-10-19 00:41:22.684530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c93d2f1e7a64'
+down_revision: Union[str, None] = 'a41c6e8f0b92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+FACET_COUNTS_QUERY = """
+WITH facet_books AS (
+    SELECT language, publisher, author,
+           (extract(year FROM published_date)::int / 10) * 10 AS decade
+    FROM book
+)
+SELECT facet, scope, value, book_count FROM (
+SELECT *, row_number() OVER (PARTITION BY facet, scope ORDER BY book_count DESC, value) AS rank FROM (
+SELECT 'language'::text AS facet,
+       concat_ws('|', CASE WHEN GROUPING(decade) = 0 THEN 'decade=' || decade END) AS scope,
+       language::text AS value, count(*)::int AS book_count
+FROM facet_books GROUP BY GROUPING SETS ((language), (language, decade))
+UNION ALL
+SELECT 'publisher'::text AS facet,
+       concat_ws('|', CASE WHEN GROUPING(language) = 0 THEN 'language=' || language END,
+                      CASE WHEN GROUPING(decade) = 0 THEN 'decade=' || decade END) AS scope,
+       publisher::text AS value, count(*)::int AS book_count
+FROM facet_books GROUP BY GROUPING SETS ((publisher), (publisher, language), (publisher, decade), (publisher, language, decade))
+UNION ALL
+SELECT 'author'::text AS facet,
+       concat_ws('|', CASE WHEN GROUPING(language) = 0 THEN 'language=' || language END,
+                      CASE WHEN GROUPING(decade) = 0 THEN 'decade=' || decade END) AS scope,
+       author::text AS value, count(*)::int AS book_count
+FROM facet_books GROUP BY GROUPING SETS ((author), (author, language), (author, decade), (author, language, decade))
+UNION ALL
+SELECT 'decade'::text AS facet,
+       concat_ws('|', CASE WHEN GROUPING(language) = 0 THEN 'language=' || language END) AS scope,
+       decade::text AS value, count(*)::int AS book_count
+FROM facet_books GROUP BY GROUPING SETS ((decade), (decade, language))
+) AS counts
+) AS ranked WHERE rank <= 100
+"""
+
+
+def upgrade() -> None:
+    # the top 100 values of each facet under each combination of the language
+    # and decade filters; publisher and author filters are served from book
+    op.execute(f"CREATE MATERIALIZED VIEW IF NOT EXISTS book_facet_counts AS {FACET_COUNTS_QUERY}")
+    op.create_index('ix_book_facet_counts_key', 'book_facet_counts', ['facet', 'scope', 'value'], unique=True, if_not_exists=True)
+    op.create_index('ix_book_facet_counts_top', 'book_facet_counts', ['facet', 'scope', sa.text('book_count DESC'), 'value'], unique=False, if_not_exists=True)
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('ix_book_language_created_at_id', 'book', ['language', 'created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_book_publisher_created_at_id', 'book', ['publisher', 'created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_book_author_created_at_id', 'book', ['author', 'created_at', 'id'], unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_book_author_created_at_id', table_name='book', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_book_publisher_created_at_id', table_name='book', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_book_language_created_at_id', table_name='book', postgresql_concurrently=True, if_exists=True)
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS book_facet_counts")
@@ -1,13 +1,18 @@
 from fastapi import FastAPI, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from src.books.routes import book_router
 from src.demo.routes import demo_router
 from src.auth.routes import auth_router
 from src.reviews.routes import review_router
 from contextlib import asynccontextmanager
-from src.db.main import init_db
+from src.db.main import init_db, replica_router
 from src.errors import register_all_errors
-from src.middleware import register_middleware
+from src.middleware import register_middleware, access_log_writer
+from src.auth.hashing import password_hasher
+from src.db.pubsub import pubsub_listener
+from src.metrics import metrics_endpoint
+from src.db.profiling import debug_queries
+from src.config import Config
 
 
 @asynccontextmanager
@@ -15,8 +20,15 @@ async def life_span(app: FastAPI):
     print(f"========================")
     print(f"🚀 Server is starting...")
     await init_db()
+    await replica_router.start()
+    await pubsub_listener.start()
+    access_log_writer.start()
     print(f"========================")
     yield
+    password_hasher.shutdown()
+    await replica_router.stop()
+    await pubsub_listener.stop()
+    access_log_writer.stop()
     print(f"========================")
     print(f"🚀 Server has been stopped")
     print(f"========================")
@@ -49,6 +61,8 @@ app = FastAPI(
     openapi_url=f"{version_prefix}/openapi.json",
     docs_url=f"{version_prefix}/docs",
     redoc_url=f"{version_prefix}/redoc",
+    lifespan=life_span,
+    default_response_class=ORJSONResponse,
 )
 
 register_all_errors(app)
@@ -56,6 +70,13 @@ register_all_errors(app)
 register_middleware(app)
 
 
+app.add_api_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+if Config.SQL_PROFILING:
+    app.add_api_route(
+        f"{version_prefix}/debug/queries", debug_queries, include_in_schema=False
+    )
+
 app.include_router(book_router, prefix=f"/api/{version}/books", tags=["books"])
 app.include_router(demo_router, prefix=f"/api/{version}/demo", tags=["demo"])
 app.include_router(auth_router, prefix=f"/api/{version}/auth", tags=["auth"])
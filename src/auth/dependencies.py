@@ -1,13 +1,11 @@
 from fastapi import Request, Depends
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
-from .utils import decode_token
+from .utils import decode_token, TOKEN_VERSION
 from src.db.redis import token_in_blocklist
-from src.db.main import get_session
-from sqlmodel.ext.asyncio.session import AsyncSession
-from .service import UserService
+from src.metrics import INVALID_TOKENS
+from .schemas import Principal
 from typing import Any, List
-from src.db.models import User
 from src.errors import (
     InvalidToken,
     RevokedToken,
@@ -17,32 +15,31 @@ from src.errors import (
     AccountNotVerified,
 )
 
-user_service = UserService()
-
 
 class TokenBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
         super().__init__(auto_error=auto_error)
 
     async def __call__(self, request: Request) -> HTTPAuthorizationCredentials | None:
-        credentials = await super().__call__(request)
-        token = credentials.credentials
-        token_data = decode_token(token)
+        # several bearer dependencies can guard one route; verify the token once
+        token_data = getattr(request.state, "token_data", None)
 
-        if not self.token_valid(token):
-            raise InvalidToken()
+        if token_data is None:
+            credentials = await super().__call__(request)
+            token_data = decode_token(credentials.credentials)
 
-        if await token_in_blocklist(token_data["jti"]):
-            raise RevokedToken()
+            if token_data is None:
+                raise InvalidToken()
 
-        self.verify_token_data(token_data)
+            if await token_in_blocklist(token_data):
+                INVALID_TOKENS.labels(reason="revoked").inc()
+                raise RevokedToken()
 
-        return token_data
+            request.state.token_data = token_data
 
-    def token_valid(self, token: str) -> bool:
-        token_data = decode_token(token)
+        self.verify_token_data(token_data)
 
-        return token_data is not None
+        return token_data
 
     def verify_token_data(self, token_data):
         raise NotImplementedError("Please override this method in child classes")
@@ -60,24 +57,25 @@ class RefreshTokenBearer(TokenBearer):
             raise RefreshTokenRequired()
 
 
-async def get_current_user(
+def get_current_principal(
     token_details: dict = Depends(AccessTokenBearer()),
-    session: AsyncSession = Depends(get_session),
-):
-    user_email = token_details["user"]["email"]
-    user = await user_service.get_user_by_email(session, user_email)
+) -> Principal:
+    # tokens minted before the claims carried role/verification are rejected
+    if token_details.get("ver") != TOKEN_VERSION:
+        INVALID_TOKENS.labels(reason="outdated").inc()
+        raise InvalidToken()
 
-    return user
+    return Principal(**token_details["user"])
 
 
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]) -> None:
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)) -> Any:
-        if not current_user.is_verified:
+    def __call__(self, principal: Principal = Depends(get_current_principal)) -> Any:
+        if not principal.is_verified:
             raise AccountNotVerified()
-        if current_user.role in self.allowed_roles:
+        if principal.role in self.allowed_roles:
             return True
 
         raise InsufficientPermissions()
@@ -0,0 +1,65 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from src.config import Config
+from src.errors import ServiceBusy
+from src.metrics import PASSWORD_HASH_DURATION
+from .utils import generate_password_hash, verify_password
+import asyncio
+import time
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop on a bounded worker pool.
+
+    At most ``max_pending`` hash operations may be queued or running at once;
+    beyond that callers get ``ServiceBusy`` immediately instead of waiting.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, use_processes: bool):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self.pending = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            executor_class = (
+                ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            )
+            self._executor = executor_class(max_workers=self.max_workers)
+
+        return self._executor
+
+    async def _run(self, operation: str, fn, *args):
+        if self.pending >= self.max_pending:
+            raise ServiceBusy()
+
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+            PASSWORD_HASH_DURATION.labels(operation=operation).observe(
+                time.perf_counter() - start
+            )
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", generate_password_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+    use_processes=Config.PASSWORD_HASH_USE_PROCESSES,
+)
@@ -1,38 +1,42 @@
-from fastapi import APIRouter, Depends, status, BackgroundTasks
+from fastapi import APIRouter, Depends, Query, status, BackgroundTasks
 from fastapi.exceptions import HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from pydantic_core import to_json
+from typing import Optional
 from .schemas import (
     UserModel,
     UserCreateModel,
     UserLoginModel,
     UserBooksModel,
+    Principal,
     EmailModel,
     PasswordResetModel,
     PasswordResetConfirmModel,
 )
 from sqlmodel.ext.asyncio.session import AsyncSession
-from .service import UserService
+from .service import UserService, user_projection
 from .utils import (
     create_access_token,
-    verify_password,
-    generate_password_hash,
     create_url_safe_token,
     decode_url_safe_token,
+    get_user_claims,
 )
+from .hashing import password_hasher
 from datetime import timedelta, datetime
 from .dependencies import (
     RefreshTokenBearer,
     AccessTokenBearer,
-    get_current_user,
+    get_current_principal,
     RoleChecker,
 )
-from src.db.redis import add_jti_to_blocklist
+from src.db.redis import add_jti_to_blocklist, revoke_user_tokens
 from src.errors import UserAlreadyExists, InvalidCredentials, InvalidToken
 from src.mail import mail, create_message
 from src.config import Config
 from src.errors import UserNotFound
-from src.db.main import get_session
-from src.celery_tasks import send_email
+from src.db.main import get_session, get_read_session
+from src.responses import json_response
+from src.celery_tasks import send_email, enqueue
 
 auth_router = APIRouter()
 user_service = UserService()
@@ -47,7 +51,7 @@ async def send_mail(emails: EmailModel):
     html = "<h1>Welcome to our app</h1>"
     subject = "Welcome to our app"
 
-    send_email.delay(emails, subject, html)
+    enqueue(send_email, emails, subject, html)
 
     return {"message": "Email sent successfully"}
 
@@ -73,7 +77,7 @@ async def create_user_account(
     emails = [email]
     subject = "Verify your email"
 
-    send_email.delay(emails, subject, html)
+    enqueue(send_email, emails, subject, html)
 
     return {
         "message": "User created successfully. Please verify your email address",
@@ -113,16 +117,10 @@ async def login_user(
     user = await user_service.get_user_by_email(session, email)
 
     if user is not None:
-        password_valid = verify_password(password, user.password_hash)
+        password_valid = await password_hasher.verify(password, user.password_hash)
 
         if password_valid:
-            access_token = create_access_token(
-                user_data={
-                    "id": user.id,
-                    "email": user.email,
-                    "role": user.role,
-                }
-            )
+            access_token = create_access_token(user_data=get_user_claims(user))
             refresh_token = create_access_token(
                 user_data={
                     "id": user.id,
@@ -148,10 +146,18 @@ async def login_user(
 
 
 @auth_router.get("/refresh_token")
-async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer())):
+async def get_new_access_token(
+    token_details: dict = Depends(RefreshTokenBearer()),
+    session: AsyncSession = Depends(get_session),
+):
     expiry_timestamp = token_details["exp"]
     if datetime.fromtimestamp(expiry_timestamp) > datetime.now():
-        new_access_token = create_access_token(user_data=token_details["user"])
+        # re-read the user so role and verification changes reach the new claims
+        user = await user_service.get_user_by_id(session, token_details["user"]["id"])
+        if user is None:
+            raise InvalidToken()
+
+        new_access_token = create_access_token(user_data=get_user_claims(user))
 
         return JSONResponse(content={"access_token": new_access_token})
 
@@ -160,21 +166,54 @@ async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer(
 
 @auth_router.get("/me", response_model=UserBooksModel)
 async def get_current_user(
-    user=Depends(get_current_user), _: bool = Depends(role_checker)
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated fields to return, e.g. `id,username,books`.",
+    ),
+    principal: Principal = Depends(get_current_principal),
+    session: AsyncSession = Depends(get_read_session),
+    _: bool = Depends(role_checker),
 ):
-    return user
+    fields = user_projection.parse(fields)
+    if fields is None:
+        user = await user_service.get_user_by_id(
+            session, principal.id, load_relations=True
+        )
+        if user is None:
+            raise UserNotFound()
+
+        return json_response(UserBooksModel, user)
+
+    profile = await user_service.get_user_profile(session, principal.id, fields)
+    if profile is None:
+        raise UserNotFound()
+
+    return Response(content=to_json(profile), media_type="application/json")
 
 
 @auth_router.get("/logout")
 async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
     jti = token_details["jti"]
-    await add_jti_to_blocklist(jti)
+    await add_jti_to_blocklist(jti, token_details["exp"])
 
     return JSONResponse(
         content={"message": "Logged out successfully"}, status_code=status.HTTP_200_OK
     )
 
 
+@auth_router.get("/logout_all")
+async def revoke_all_tokens(token_details: dict = Depends(AccessTokenBearer())):
+    user_id = token_details["user"]["id"]
+    await revoke_user_tokens(
+        user_id, int(timedelta(days=REFRESH_TOKEN_EXPIRY).total_seconds())
+    )
+
+    return JSONResponse(
+        content={"message": "Logged out of all sessions successfully"},
+        status_code=status.HTTP_200_OK,
+    )
+
+
 @auth_router.post("/reset-password-request")
 async def reset_password(email_data: PasswordResetModel):
     email = email_data.email
@@ -223,7 +262,7 @@ async def reset_account_password(
         if not user:
             raise UserNotFound()
 
-        password_hash = generate_password_hash(new_password)
+        password_hash = await password_hasher.hash(new_password)
         await user_service.update_user(session, user, {"password_hash": password_hash})
 
         return JSONResponse(
@@ -30,6 +30,13 @@ class UserBooksModel(UserModel):
     reviews: List[ReviewModel]
 
 
+class Principal(BaseModel):
+    id: str
+    email: str
+    role: str
+    is_verified: bool
+
+
 class UserLoginModel(BaseModel):
     email: str = Field(max_length=40)
     password: str = Field(min_length=6)
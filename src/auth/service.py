@@ -1,17 +1,76 @@
-from src.db.models import User
+from src.db.models import Book, Review, User
+from src.db.projection import Projection
+from src.books.service import book_projection
 from .schemas import UserCreateModel
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
-from .utils import generate_password_hash
+from sqlalchemy import select as select_columns
+from sqlalchemy.orm import selectinload
+from .hashing import password_hasher
+from typing import Optional, Sequence
+
+# the fields of UserBooksModel; the collections are loaded separately
+user_projection = Projection(
+    {
+        "id": [User.id],
+        "username": [User.username],
+        "email": [User.email],
+        "first_name": [User.first_name],
+        "last_name": [User.last_name],
+        "is_verified": [User.is_verified],
+        "created_at": [User.created_at],
+        "updated_at": [User.updated_at],
+        "books": [],
+        "reviews": [],
+    }
+)
 
 
 class UserService:
-    async def get_user_by_email(
+    async def get_user_by_email(self, session: AsyncSession, email: str):
+        statement = select(User).where(User.email == email)
+        result = await session.exec(statement)
+        user = result.first()
+
+        return user
+
+    async def get_user_profile(
+        self, session: AsyncSession, user_id: str, fields: Sequence[str]
+    ) -> Optional[dict]:
+        """Only the requested ``fields`` of a user, read as plain rows."""
+        columns = [f for f in fields if f not in ("books", "reviews")]
+        statement = user_projection.statement(columns, User.id)
+        result = await session.exec(statement.where(User.id == user_id))
+        row = result.first()
+        if row is None:
+            return None
+
+        profile = user_projection.dump(row, columns)
+        if "books" in fields:
+            statement = book_projection.statement(book_projection.fields)
+            result = await session.exec(statement.where(Book.user_id == user_id))
+            profile["books"] = [
+                book_projection.dump(book, book_projection.fields)
+                for book in result.all()
+            ]
+        if "reviews" in fields:
+            statement = select_columns(*Review.__table__.c)
+            result = await session.exec(statement.where(Review.user_id == user_id))
+            profile["reviews"] = [dict(review._mapping) for review in result.all()]
+
+        return profile
+
+    async def get_user_by_id(
         self,
         session: AsyncSession,
-        email: str,
+        user_id: str,
+        load_relations: bool = False,
     ):
-        statement = select(User).where(User.email == email)
+        statement = select(User).where(User.id == user_id)
+        if load_relations:
+            statement = statement.options(
+                selectinload(User.books), selectinload(User.reviews)
+            ).execution_options(populate_existing=True)
         result = await session.exec(statement)
         user = result.first()
 
@@ -25,7 +84,7 @@ class UserService:
     async def create_user(self, user_data: UserCreateModel, session: AsyncSession):
         user_data_dict = user_data.model_dump()
         new_user = User(**user_data_dict)
-        new_user.password_hash = generate_password_hash(user_data_dict["password"])
+        new_user.password_hash = await password_hasher.hash(user_data_dict["password"])
         new_user.role = "user"
 
         session.add(new_user)
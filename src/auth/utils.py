@@ -1,14 +1,17 @@
 from passlib.context import CryptContext
 from datetime import timedelta, datetime
 from src.config import Config
+from src.metrics import INVALID_TOKENS
 from cuid import cuid
 from itsdangerous import URLSafeTimedSerializer
 import jwt
 import logging
+import time
 
 passwd_context = CryptContext(schemes=["bcrypt"])
 
 ACCESS_TOKEN_EXPIRY = 3600
+TOKEN_VERSION = 1
 
 
 def generate_password_hash(password: str) -> str:
@@ -29,13 +32,24 @@ def create_access_token(
     payload["exp"] = datetime.now() + (
         expiry if expiry is not None else timedelta(seconds=ACCESS_TOKEN_EXPIRY)
     )
+    payload["iat"] = time.time()
     payload["jti"] = cuid()
     payload["refresh"] = refresh
+    payload["ver"] = TOKEN_VERSION
     token = jwt.encode(payload, key=Config.JWT_SECRET, algorithm=Config.JWT_ALGORITHM)
 
     return token
 
 
+def get_user_claims(user) -> dict:
+    return {
+        "id": user.id,
+        "email": user.email,
+        "role": user.role,
+        "is_verified": user.is_verified,
+    }
+
+
 def decode_token(token: str) -> dict:
     try:
         token_data = jwt.decode(
@@ -44,10 +58,14 @@ def decode_token(token: str) -> dict:
 
         return token_data
 
-    except jwt.PyJWTError as e:
-        logging.exception(e)
+    except jwt.ExpiredSignatureError:
+        INVALID_TOKENS.labels(reason="expired").inc()
+    except jwt.InvalidSignatureError:
+        INVALID_TOKENS.labels(reason="bad_signature").inc()
+    except jwt.PyJWTError:
+        INVALID_TOKENS.labels(reason="malformed").inc()
 
-        return None
+    return None
 
 
 serializer = URLSafeTimedSerializer(
@@ -0,0 +1,406 @@
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+from sqlalchemy import Text, cast, func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.config import Config
+from src.db.main import async_session_maker
+from src.db.models import Book
+from src.db.pubsub import pubsub_listener, publish
+import asyncio
+import heapq
+import json
+import logging
+import re
+import time
+import unicodedata
+
+BOOK_EVENTS_CHANNEL = "bookly:books"
+KINDS = ("title", "author")
+EDIT_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+FUZZY_MIN_LENGTH = 3
+# bounds the work of a query whose complete words are very common
+MAX_CANDIDATES = 10_000
+BUILD_BATCH_SIZE = 1000
+
+NON_WORD = re.compile(r"[\W_]+")
+
+logger = logging.getLogger(__name__)
+
+# (title, author, weight delta)
+Change = Tuple[str, str, int]
+
+
+def normalize(text: str) -> str:
+    if text.isascii():
+        return NON_WORD.sub(" ", text.lower())
+
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+
+    return NON_WORD.sub(" ", text)
+
+
+def tokenize(text: str) -> List[str]:
+    return normalize(text).split()
+
+
+def edits1(word: str) -> Set[str]:
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    deletes = [a + b[1:] for a, b in splits if b]
+    transposes = [a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1]
+    replaces = [a + c + b[1:] for a, b in splits if b for c in EDIT_ALPHABET]
+    inserts = [a + c + b for a, b in splits for c in EDIT_ALPHABET]
+
+    return set(deletes + transposes + replaces + inserts) - {word}
+
+
+class AutocompleteIndex:
+    """Prefix index over book titles and authors.
+
+    Every distinct title and author is one entry with a popularity weight
+    (books plus reviews). Tokens are kept in a sorted list for prefix range
+    scans, and each token's postings are an ``array`` of entry ids ordered
+    by descending weight, so the best matches of a token come first and a
+    scan can stop as soon as it cannot beat the current top results.
+    """
+
+    def __init__(self):
+        self._texts: List[Optional[str]] = []
+        self._kinds = bytearray()
+        self._weights = array("q")
+        self._free: List[int] = []
+        self._ids: Tuple[Dict[str, int], ...] = tuple({} for _ in KINDS)
+        self._tokens: List[str] = []
+        self._postings: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts) - len(self._free)
+
+    def _weight_key(self, entry: int) -> int:
+        return -self._weights[entry]
+
+    def _place(self, postings: array, entry: int) -> None:
+        weight = self._weights[entry]
+        if not postings or self._weights[postings[-1]] >= weight:
+            postings.append(entry)
+            return
+
+        position = bisect_right(postings, -weight, key=self._weight_key)
+        postings.insert(position, entry)
+
+    def _reposition(self, postings: array, entry: int) -> None:
+        i = postings.index(entry)
+        weight = self._weights[entry]
+        if (i == 0 or self._weights[postings[i - 1]] >= weight) and (
+            i == len(postings) - 1 or self._weights[postings[i + 1]] <= weight
+        ):
+            return
+
+        postings.pop(i)
+        self._place(postings, entry)
+
+    def _new_entry(self, kind: int, text: str, weight: int) -> int:
+        if self._free:
+            entry = self._free.pop()
+            self._texts[entry] = text
+            self._kinds[entry] = kind
+            self._weights[entry] = weight
+        else:
+            entry = len(self._texts)
+            self._texts.append(text)
+            self._kinds.append(kind)
+            self._weights.append(weight)
+        self._ids[kind][text] = entry
+
+        for token in set(tokenize(text)):
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = array("I")
+                insort(self._tokens, token)
+            self._place(postings, entry)
+
+        return entry
+
+    def _remove_entry(self, kind: int, text: str, entry: int) -> None:
+        for token in set(tokenize(text)):
+            postings = self._postings[token]
+            postings.remove(entry)
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect_left(self._tokens, token)]
+
+        del self._ids[kind][text]
+        self._texts[entry] = None
+        self._weights[entry] = 0
+        self._free.append(entry)
+
+    def add(self, kind: int, text: str, delta: int) -> None:
+        text = text.strip()
+        entry = self._ids[kind].get(text)
+        if entry is None:
+            if delta > 0 and text:
+                self._new_entry(kind, text, delta)
+            return
+
+        weight = self._weights[entry] + delta
+        if weight <= 0:
+            self._remove_entry(kind, text, entry)
+            return
+
+        self._weights[entry] = weight
+        for token in set(tokenize(text)):
+            self._reposition(self._postings[token], entry)
+
+    def apply(self, changes: Iterable[Change]) -> None:
+        for title, author, delta in changes:
+            self.add(0, title, delta)
+            self.add(1, author, delta)
+
+    def _top_for_prefix(
+        self, prefix: str, limit: int, exclude: Set[int]
+    ) -> List[Tuple[int, int]]:
+        top: List[Tuple[int, int]] = []
+        seen = set(exclude)
+        for i in range(bisect_left(self._tokens, prefix), len(self._tokens)):
+            token = self._tokens[i]
+            if not token.startswith(prefix):
+                break
+
+            for entry in self._postings[token]:
+                weight = self._weights[entry]
+                if len(top) == limit and weight <= top[0][0]:
+                    break
+                if entry in seen:
+                    continue
+                seen.add(entry)
+                if len(top) < limit:
+                    heapq.heappush(top, (weight, entry))
+                else:
+                    heapq.heapreplace(top, (weight, entry))
+
+        return sorted(top, reverse=True)
+
+    def _filter(
+        self, words: List[str], prefixes: Tuple[str, ...], limit: int
+    ) -> List[int]:
+        # walk the rarest word's postings, which are already by weight
+        rarest = min(words, key=lambda w: len(self._postings[w]))
+        found = []
+        for entry in self._postings[rarest][:MAX_CANDIDATES]:
+            tokens = tokenize(self._texts[entry])
+            if not all(word in tokens for word in words):
+                continue
+            if prefixes and not any(t.startswith(prefixes) for t in tokens):
+                continue
+            found.append(entry)
+            if len(found) == limit:
+                break
+
+        return found
+
+    def _resolve(self, word: str) -> Optional[str]:
+        if word in self._postings:
+            return word
+
+        if len(word) < FUZZY_MIN_LENGTH:
+            return None
+
+        # take the most common token one edit away
+        variants = [v for v in edits1(word) if v in self._postings]
+        if not variants:
+            return None
+
+        return max(variants, key=lambda v: len(self._postings[v]))
+
+    def _has_prefix(self, prefix: str) -> bool:
+        i = bisect_left(self._tokens, prefix)
+
+        return i < len(self._tokens) and self._tokens[i].startswith(prefix)
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, str]]:
+        normalized = normalize(query)
+        words = normalized.split()
+        if not words:
+            return []
+
+        prefix = None
+        if not normalized.endswith(" "):
+            prefix = words.pop()
+
+        resolved = [self._resolve(word) for word in words]
+        if None in resolved:
+            return []
+
+        if resolved:
+            prefixes = (prefix,) if prefix is not None else ()
+            found = self._filter(resolved, prefixes, limit)
+            if not found and prefix is not None and len(prefix) >= FUZZY_MIN_LENGTH:
+                variants = tuple(v for v in edits1(prefix) if self._has_prefix(v))
+                if variants:
+                    found = self._filter(resolved, variants, limit)
+        else:
+            top = self._top_for_prefix(prefix, limit, set())
+            if len(top) < limit and len(prefix) >= FUZZY_MIN_LENGTH:
+                exclude = {entry for _, entry in top}
+                fuzzy = []
+                for variant in edits1(prefix):
+                    if self._has_prefix(variant):
+                        fuzzy.extend(self._top_for_prefix(variant, limit, exclude))
+                # exact prefix matches always rank above corrected ones
+                seen = set(exclude)
+                for weight, entry in sorted(fuzzy, reverse=True):
+                    if len(top) == limit:
+                        break
+                    if entry not in seen:
+                        seen.add(entry)
+                        top.append((weight, entry))
+            found = [entry for _, entry in top]
+
+        return [(self._texts[e], KINDS[self._kinds[e]]) for e in found]
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self),
+            "tokens": len(self._tokens),
+            "postings": sum(len(p) for p in self._postings.values()),
+        }
+
+
+class Snapshot(NamedTuple):
+    """A Postgres ``pg_snapshot``: the transactions a reader could see."""
+
+    xmin: int
+    xmax: int
+    xip: FrozenSet[int]
+
+    @classmethod
+    def parse(cls, value: str) -> "Snapshot":
+        xmin, xmax, xip = value.split(":")
+
+        return cls(int(xmin), int(xmax), frozenset(int(x) for x in xip.split(",") if x))
+
+    def sees(self, xid: int) -> bool:
+        return xid < self.xmin or (xid < self.xmax and xid not in self.xip)
+
+
+class Autocomplete:
+    """Per-worker autocomplete index kept in sync through pub/sub.
+
+    Changes carry the id of the transaction that committed them. A rebuild
+    reads the books under one snapshot and then replays the changes that
+    arrived meanwhile, skipping those whose transaction the snapshot already
+    saw; the snapshot is kept to skip them if they arrive after the swap.
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.ready = False
+        self.last_rebuild_seconds: Optional[float] = None
+        self.index = AutocompleteIndex()
+        self._snapshot: Optional[Snapshot] = None
+        self._pending: Optional[List[Tuple[Optional[int], List[Change]]]] = None
+        self._rebuild_task: Optional[asyncio.Task] = None
+
+    def _includes(self, snapshot: Optional[Snapshot], xid: Optional[int]) -> bool:
+        return snapshot is not None and xid is not None and snapshot.sees(xid)
+
+    def apply(self, changes: List[Change], xid: Optional[int] = None) -> None:
+        if not self._includes(self._snapshot, xid):
+            self.index.apply(changes)
+        if self._pending is not None:
+            self._pending.append((xid, changes))
+
+    async def rebuild(self) -> None:
+        started = time.perf_counter()
+        self._pending = []
+        try:
+            index = AutocompleteIndex()
+            statement = select(Book.title, Book.author, Book.review_count)
+            # not a replica: changes lost while pub/sub was down, or sent before
+            # _pending was set, may not have been replayed there yet, and the
+            # snapshot would then see neither them nor their rows
+            async with async_session_maker() as session:
+                # the snapshot query and the scan must share one snapshot
+                await session.connection(
+                    execution_options={"isolation_level": "REPEATABLE READ"}
+                )
+                result = await session.exec(
+                    select(cast(func.pg_current_snapshot(), Text))
+                )
+                snapshot = Snapshot.parse(result.one())
+                result = await session.stream(
+                    statement.execution_options(yield_per=BUILD_BATCH_SIZE)
+                )
+                async for rows in result.partitions():
+                    index.apply(
+                        (title, author, 1 + review_count)
+                        for title, author, review_count in rows
+                    )
+            for xid, changes in self._pending:
+                if not self._includes(snapshot, xid):
+                    index.apply(changes)
+        finally:
+            self._pending = None
+
+        self.index = index
+        self._snapshot = snapshot
+        self.ready = True
+        self.last_rebuild_seconds = time.perf_counter() - started
+        logger.info(
+            "autocomplete index rebuilt: %d entries, %d tokens, %.3fs",
+            len(index),
+            index.stats()["tokens"],
+            self.last_rebuild_seconds,
+        )
+
+    def schedule_rebuild(self) -> None:
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self.rebuild())
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, str]]:
+        return self.index.search(query, limit)
+
+
+autocomplete = Autocomplete(enabled=Config.AUTOCOMPLETE_ENABLED)
+
+
+async def current_xact_id(session: AsyncSession) -> Optional[int]:
+    """Id of the session's transaction, to be read before it commits and
+    published with its changes."""
+    if not autocomplete.enabled:
+        return None
+
+    result = await session.exec(select(cast(func.pg_current_xact_id(), Text)))
+
+    return int(result.one())
+
+
+async def publish_book_changes(*changes: Change, xid: Optional[int] = None) -> None:
+    """Tell every worker's index that book weights changed.
+
+    A book weighs one plus its review count; adding, editing, deleting and
+    reviewing a book are all expressed as weight deltas on its title and
+    author. ``xid`` is the committing transaction from ``current_xact_id``.
+    """
+    changes = [c for c in changes if c[2]]
+    if autocomplete.enabled and changes:
+        message = {"xid": xid, "changes": changes}
+        await publish(BOOK_EVENTS_CHANNEL, json.dumps(message))
+
+
+async def _on_book_changes(message: str) -> None:
+    message = json.loads(message)
+    autocomplete.apply(message["changes"], message["xid"])
+
+
+async def _on_connect() -> None:
+    # changes published while we were disconnected are gone, and building
+    # takes long enough that it must not hold up the other subscribers
+    autocomplete.schedule_rebuild()
+
+
+if autocomplete.enabled:
+    pubsub_listener.subscribe(BOOK_EVENTS_CHANNEL, _on_book_changes)
+    pubsub_listener.on_connect(_on_connect)
@@ -0,0 +1,70 @@
+from typing import Optional, Sequence
+from src.config import Config
+from src.db.cache import ResponseCache
+
+book_cache = ResponseCache(
+    "books",
+    ttl=Config.BOOK_CACHE_TTL,
+    stale_ttl=Config.BOOK_CACHE_STALE_TTL,
+    lock_timeout=Config.CACHE_LOCK_TIMEOUT,
+)
+
+ALL_BOOKS = "all"
+
+
+def user_books_generation(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+def book_generation(book_id: str) -> str:
+    return f"book:{book_id}"
+
+
+async def book_detail_key(book_id: str, reviews_limit: Optional[int] = None) -> str:
+    # one entry per embedded review count, all dropped together by a bump
+    generation = await book_cache.get_generation(book_generation(book_id))
+    reviews = "all" if reviews_limit is None else reviews_limit
+
+    return f"detail:{book_id}:{generation}:{reviews}"
+
+
+def _fields_key(fields: Optional[Sequence[str]]) -> str:
+    return "" if fields is None else ",".join(fields)
+
+
+async def book_list_key(
+    limit: int, cursor: Optional[str], fields: Optional[Sequence[str]] = None
+) -> str:
+    generation = await book_cache.get_generation(ALL_BOOKS)
+
+    return f"list:{generation}:{limit}:{cursor or ''}:{_fields_key(fields)}"
+
+
+async def user_books_key(
+    user_id: str,
+    limit: int,
+    cursor: Optional[str],
+    fields: Optional[Sequence[str]] = None,
+) -> str:
+    generation = await book_cache.get_generation(user_books_generation(user_id))
+
+    return f"user:{user_id}:{generation}:{limit}:{cursor or ''}:{_fields_key(fields)}"
+
+
+async def invalidate_book(book_id: str, user_id: Optional[str]) -> None:
+    """Drop the cached detail of a book and every listing it can appear in."""
+    generations = [book_generation(book_id), ALL_BOOKS]
+    if user_id is not None:
+        generations.append(user_books_generation(user_id))
+    await book_cache.bump_generation(*generations)
+
+
+async def invalidate_book_detail(book_id: str) -> None:
+    """Drop only the cached detail of a book, e.g. after a review. Listings
+    keep showing its old review aggregates for up to ``BOOK_CACHE_TTL``
+    rather than every review emptying the cache of list pages."""
+    await book_cache.bump_generation(book_generation(book_id))
+
+
+async def invalidate_book_lists(user_id: str) -> None:
+    await book_cache.bump_generation(ALL_BOOKS, user_books_generation(user_id))
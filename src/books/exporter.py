@@ -0,0 +1,84 @@
+from datetime import date, datetime
+from typing import AsyncIterator, Literal, Optional, Sequence
+from sqlalchemy import Row
+from sqlmodel import select
+from src.db.main import open_read_session
+from src.db.models import Book
+from .service import BOOK_ORDERING
+import csv
+import io
+import json
+
+ExportFormat = Literal["ndjson", "csv"]
+
+EXPORT_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.author,
+    Book.publisher,
+    Book.published_date,
+    Book.page_count,
+    Book.language,
+    Book.user_id,
+    Book.review_count,
+    Book.rating_sum,
+    Book.created_at,
+    Book.updated_at,
+)
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def encode_ndjson(rows: Sequence[Row]) -> bytes:
+    return "".join(
+        json.dumps({k: _plain(v) for k, v in row._mapping.items()}) + "\n"
+        for row in rows
+    ).encode()
+
+
+def encode_csv(rows: Sequence[Row]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([[_plain(v) for v in row] for row in rows])
+
+    return buffer.getvalue().encode()
+
+
+async def export_books(
+    fmt: ExportFormat,
+    user_id: Optional[str] = None,
+    language: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+) -> AsyncIterator[bytes]:
+    """Stream the matching books from a server-side cursor, one encoded
+    chunk per ``EXPORT_BATCH_SIZE`` rows, so memory does not grow with the
+    size of the catalog."""
+    statement = select(*EXPORT_COLUMNS)
+    if user_id is not None:
+        statement = statement.where(Book.user_id == user_id)
+    if language is not None:
+        statement = statement.where(Book.language == language)
+    if created_from is not None:
+        statement = statement.where(Book.created_at >= created_from)
+    if created_to is not None:
+        statement = statement.where(Book.created_at < created_to)
+    statement = statement.order_by(*BOOK_ORDERING).execution_options(
+        yield_per=EXPORT_BATCH_SIZE
+    )
+
+    if fmt == "csv":
+        encode = encode_csv
+        yield encode_csv([[c.key for c in EXPORT_COLUMNS]])
+    else:
+        encode = encode_ndjson
+
+    # the request's session is closed before the body is sent, so use our own
+    async with open_read_session() as session:
+        result = await session.stream(statement)
+        async for rows in result.partitions():
+            yield encode(rows)
@@ -0,0 +1,142 @@
+from datetime import datetime, timezone
+from typing import Optional
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from sqlalchemy import Integer, desc, func, literal_column, text
+from src.config import Config
+from src.db.cache import ResponseCache
+from src.db.models import BOOK_DECADE, FACET_SCOPES, Book, book_facet_counts
+from src.db.redis import redis_client
+from .schemas import BookFacetsModel
+import hashlib
+import json
+import logging
+import time
+
+FACETS_GENERATION = "view"
+FACETS_REFRESHED_AT_KEY = "book_facets:refreshed_at"
+
+BOOK_FACET_COLUMNS = {
+    "language": Book.language,
+    "publisher": Book.publisher,
+    "author": Book.author,
+    "decade": literal_column(BOOK_DECADE, type_=Integer),
+}
+
+logger = logging.getLogger(__name__)
+
+# entries are keyed by the view's generation, so none outlives the view it
+# was read from; the TTL bounds the counts read straight from the book table
+facet_cache = ResponseCache(
+    "facets",
+    ttl=Config.BOOK_FACETS_MAX_STALENESS // 2,
+    stale_ttl=0,
+    lock_timeout=Config.CACHE_LOCK_TIMEOUT,
+)
+
+
+def facet_scope(facet: str, filters: dict) -> str:
+    # must match the scope column built by _facet_counts_query
+    return "|".join(
+        f"{name}={filters[name]}"
+        for name in FACET_SCOPES[facet]
+        if filters[name] is not None
+    )
+
+
+async def facet_counts_key(filters: dict) -> str:
+    generation = await facet_cache.get_generation(FACETS_GENERATION)
+    digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+
+    return f"counts:{generation}:{digest}"
+
+
+def facet_counts_statement(facet: str, filters: dict):
+    """Top values of ``facet`` among the books matching every other filter,
+    and whether they come from the ``book_facet_counts`` view."""
+    others = {k: v for k, v in filters.items() if k != facet and v is not None}
+    if others.keys() <= set(FACET_SCOPES[facet]):
+        counts = book_facet_counts.c
+        statement = (
+            select(counts.value, counts.book_count)
+            .where(counts.facet == facet, counts.scope == facet_scope(facet, filters))
+            .order_by(desc(counts.book_count), counts.value)
+            .limit(Config.BOOK_FACETS_LIMIT)
+        )
+        return statement, True
+
+    # an author's or a publisher's books are few enough to count through the
+    # index on that column
+    column = BOOK_FACET_COLUMNS[facet]
+    book_count = func.count().label("book_count")
+    statement = (
+        select(column, book_count)
+        .where(*[BOOK_FACET_COLUMNS[k] == v for k, v in others.items()])
+        .group_by(column)
+        .order_by(desc(book_count), column)
+        .limit(Config.BOOK_FACETS_LIMIT)
+    )
+    return statement, False
+
+
+async def get_facets_refreshed_at() -> Optional[datetime]:
+    refreshed_at = await redis_client.get(FACETS_REFRESHED_AT_KEY)
+
+    return datetime.fromisoformat(refreshed_at.decode()) if refreshed_at else None
+
+
+async def get_facet_counts(
+    session: AsyncSession,
+    language: Optional[str] = None,
+    publisher: Optional[str] = None,
+    author: Optional[str] = None,
+    decade: Optional[int] = None,
+) -> BookFacetsModel:
+    """Counts per facet value under every filter except the facet's own,
+    so clients can show how many books each alternative would give."""
+    filters = {
+        "language": language,
+        "publisher": publisher,
+        "author": author,
+        "decade": decade,
+    }
+
+    async def load():
+        # read before the view, so a refresh finishing meanwhile can only
+        # make the counts newer than reported
+        view_refreshed_at = await get_facets_refreshed_at()
+        refreshed_at = datetime.now(timezone.utc)
+        counts = {}
+        for name in FACET_SCOPES:
+            statement, from_view = facet_counts_statement(name, filters)
+            if from_view:
+                refreshed_at = view_refreshed_at
+            result = await session.exec(statement)
+            counts[name] = [
+                {"value": int(v) if name == "decade" else v, "count": c}
+                for v, c in result.all()
+            ]
+
+        return BookFacetsModel(**counts, refreshed_at=refreshed_at).model_dump_json()
+
+    key = await facet_counts_key(filters)
+    payload = await facet_cache.get_or_set(key, load)
+
+    return BookFacetsModel.model_validate_json(payload)
+
+
+async def refresh_facets(session: AsyncSession) -> None:
+    refreshed_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    # CONCURRENTLY keeps the view readable while it is rebuilt
+    await session.execute(
+        text("REFRESH MATERIALIZED VIEW CONCURRENTLY book_facet_counts")
+    )
+    await session.commit()
+    await redis_client.set(FACETS_REFRESHED_AT_KEY, refreshed_at.isoformat())
+    await facet_cache.bump_generation(FACETS_GENERATION)
+
+    elapsed = time.perf_counter() - started
+    if elapsed > Config.BOOK_FACETS_MAX_STALENESS / 2:
+        # the schedule leaves half the staleness bound for the refresh itself
+        logger.warning("book facets refresh took %.1fs", elapsed)
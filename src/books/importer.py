@@ -0,0 +1,256 @@
+from typing import AsyncIterator, List, Optional, Tuple
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from pydantic import ValidationError
+from cuid import cuid
+from src.config import Config
+from src.db.models import Book
+from src.db.redis import redis_client
+from src.errors import ImportNotFound, UnsupportedImportFormat
+from .schemas import BookCreateModel, BookImportErrorModel, BookImportResultModel
+from .cache import invalidate_book_lists
+from .autocomplete import current_xact_id, publish_book_changes
+import codecs
+import csv
+import json
+import time
+
+IMPORT_PROGRESS_PREFIX = "book_import:"
+
+book_table = Book.__table__
+# executed with a list of rows, SQLAlchemy packs the batch into multi-row
+# VALUES pages while compiling the statement only once
+INSERT_BOOKS = (
+    insert(book_table)
+    .on_conflict_do_nothing(index_elements=["id"])
+    .returning(book_table.c.title, book_table.c.author)
+)
+
+# (row number, parsed fields, parse error)
+ParsedRow = Tuple[int, Optional[dict], Optional[str]]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def parse_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[ParsedRow]:
+    row = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        row += 1
+
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, None, f"invalid JSON: {e}"
+            continue
+
+        if not isinstance(record, dict):
+            yield row, None, "expected a JSON object"
+            continue
+
+        yield row, record, None
+
+
+async def parse_csv(
+    chunks: AsyncIterator[bytes],
+    max_record_size: int = Config.BOOK_IMPORT_MAX_CSV_RECORD_SIZE,
+) -> AsyncIterator[ParsedRow]:
+    header = None
+    row = 0
+    pending: List[str] = []
+    pending_size = 0
+    open_quote = False
+    async for line in iter_lines(chunks):
+        pending.append(line)
+        pending_size += len(line) + 1
+        # an odd number of quotes means a quoted field continues on the next line
+        open_quote ^= line.count('"') % 2 == 1
+        if open_quote:
+            if pending_size > max_record_size:
+                # most likely a stray quote; drop the record instead of
+                # swallowing the rest of the upload into it
+                row += 1
+                yield row, None, f"quoted field exceeds {max_record_size} characters"
+                pending, pending_size, open_quote = [], 0, False
+            continue
+        text = "\n".join(pending)
+        pending, pending_size = [], 0
+
+        if not text.strip():
+            continue
+        fields = next(csv.reader([text]))
+
+        if header is None:
+            header = [field.strip() for field in fields]
+            continue
+        row += 1
+
+        if len(fields) != len(header):
+            yield row, None, f"expected {len(header)} fields, got {len(fields)}"
+            continue
+
+        yield row, dict(zip(header, fields)), None
+
+    if pending:
+        yield row + 1, None, "unterminated quoted field"
+
+
+PARSERS = {
+    "application/x-ndjson": parse_ndjson,
+    "application/ndjson": parse_ndjson,
+    "text/csv": parse_csv,
+}
+
+
+def _progress_key(import_id: str) -> str:
+    return f"{IMPORT_PROGRESS_PREFIX}{import_id}"
+
+
+class BookImportService:
+    """Streams NDJSON or CSV book rows into the database in batches.
+
+    Every batch is committed on its own and the last committed row is kept
+    in Redis under the import id, so an interrupted upload can be sent again
+    with ``import_id`` and picks up after that row. Book ids are derived from
+    the import id and row number, which makes re-inserting a batch whose
+    progress was not recorded a no-op.
+    """
+
+    def __init__(self, batch_size: int, max_reported_errors: int, progress_ttl: int):
+        self.batch_size = batch_size
+        self.max_reported_errors = max_reported_errors
+        self.progress_ttl = progress_ttl
+
+    async def _load_progress(self, import_id: str, user_id: str) -> dict:
+        progress = await redis_client.hgetall(_progress_key(import_id))
+        if not progress or progress[b"user_id"].decode() != user_id:
+            raise ImportNotFound()
+
+        return {
+            "rows": int(progress[b"rows"]),
+            "inserted": int(progress[b"inserted"]),
+            "failed": int(progress[b"failed"]),
+        }
+
+    async def _save_progress(self, import_id: str, user_id: str, progress: dict):
+        key = _progress_key(import_id)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={"user_id": user_id, **progress})
+            pipe.expire(key, self.progress_ttl)
+            await pipe.execute()
+
+    async def import_books(
+        self,
+        session: AsyncSession,
+        chunks: AsyncIterator[bytes],
+        content_type: str,
+        user_id: str,
+        import_id: Optional[str] = None,
+    ) -> BookImportResultModel:
+        parser = PARSERS.get(content_type.split(";", 1)[0].strip().lower())
+        if parser is None:
+            raise UnsupportedImportFormat()
+
+        started = time.perf_counter()
+        if import_id is None:
+            import_id = cuid()
+            progress = {"rows": 0, "inserted": 0, "failed": 0}
+        else:
+            progress = await self._load_progress(import_id, user_id)
+        resumed_from = progress["rows"]
+
+        errors: List[BookImportErrorModel] = []
+        errors_truncated = False
+        batch: List[dict] = []
+        batch_failed = 0
+        last_row = resumed_from
+
+        async def flush():
+            nonlocal batch, batch_failed
+            if batch:
+                result = await session.execute(INSERT_BOOKS, batch)
+                inserted = result.all()
+                xid = await current_xact_id(session)
+                await session.commit()
+                progress["inserted"] += len(inserted)
+                await publish_book_changes(
+                    *((title, author, 1) for title, author in inserted), xid=xid
+                )
+            progress["failed"] += batch_failed
+            progress["rows"] = last_row
+            await self._save_progress(import_id, user_id, progress)
+            batch, batch_failed = [], 0
+
+        try:
+            async for row, record, error in parser(chunks):
+                if row <= resumed_from:
+                    continue
+                last_row = row
+
+                row_errors = [error] if error is not None else []
+                if error is None:
+                    try:
+                        book = BookCreateModel.model_validate(record)
+                    except ValidationError as e:
+                        row_errors = [
+                            f"{'.'.join(map(str, err['loc']))}: {err['msg']}"
+                            for err in e.errors()
+                        ]
+                    else:
+                        batch.append(
+                            {
+                                **book.model_dump(),
+                                "id": f"{import_id}-{row}",
+                                "user_id": user_id,
+                            }
+                        )
+
+                if row_errors:
+                    batch_failed += 1
+                    if len(errors) < self.max_reported_errors:
+                        errors.append(BookImportErrorModel(row=row, errors=row_errors))
+                    else:
+                        errors_truncated = True
+
+                if len(batch) + batch_failed >= self.batch_size:
+                    await flush()
+
+            await flush()
+        finally:
+            if progress["rows"] > resumed_from:
+                await invalidate_book_lists(user_id)
+
+        elapsed = time.perf_counter() - started
+        processed = progress["rows"] - resumed_from
+
+        return BookImportResultModel(
+            import_id=import_id,
+            resumed_from=resumed_from,
+            rows=progress["rows"],
+            inserted=progress["inserted"],
+            failed=progress["failed"],
+            errors=errors,
+            errors_truncated=errors_truncated,
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_second=round(processed / elapsed, 1) if elapsed else 0.0,
+        )
+
+
+book_import_service = BookImportService(
+    batch_size=Config.BOOK_IMPORT_BATCH_SIZE,
+    max_reported_errors=Config.BOOK_IMPORT_MAX_REPORTED_ERRORS,
+    progress_ttl=Config.BOOK_IMPORT_PROGRESS_TTL,
+)
@@ -1,53 +1,189 @@
-from fastapi import APIRouter, status, Depends
-from typing import List
+from fastapi import APIRouter, status, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from typing import List, Optional, Tuple
+from datetime import date, datetime
+from pydantic_core import to_json
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.books.schemas import (
     BookModel,
     BookCreateModel,
     BookUpdateModel,
     BookDetailModel,
+    BookPageModel,
+    BookImportResultModel,
+    BookSearchPageModel,
+    BookSuggestionModel,
+    BookBrowseModel,
+    BookBatchRequestModel,
+    BookBatchModel,
 )
-from src.books.service import BookService
-from src.db.main import get_session
+from src.books.service import BookService, book_projection
+from src.books.importer import book_import_service
+from src.books.exporter import ExportFormat, MEDIA_TYPES, export_books
+from src.books.autocomplete import autocomplete
+from src.books.facets import get_facet_counts
+from src.reviews.schemas import ReviewModel
+from src.reviews.service import ReviewService
+from src.books.cache import book_cache, book_detail_key, book_list_key, user_books_key
+from src.db.main import get_session, get_read_session
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 from src.auth.dependencies import AccessTokenBearer, RoleChecker
-from src.errors import BookNotFound
-
+from src.errors import AutocompleteDisabled, BookNotFound, ServiceBusy
+from src.responses import json_response
 
 book_router = APIRouter()
 book_service = BookService()
+review_service = ReviewService()
 access_token_bearer = AccessTokenBearer()
 role_checker = Depends(RoleChecker(["admin"]))
 
+FIELDS_DESCRIPTION = (
+    "Comma separated book fields to return, e.g. `id,title,author`. "
+    "Defaults to all of them."
+)
+
+
+def parse_book_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    # all of BookModel by default: dicts built from the selected columns cost
+    # a fraction of hydrating ORM rows and validating them into models
+    return book_projection.parse(fields) or book_projection.fields
+
 
 @book_router.get(
     "/",
-    response_model=List[BookModel],
+    response_model=BookPageModel,
     status_code=status.HTTP_200_OK,
     dependencies=[role_checker],
 )
 async def find_all(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    # misses fill an entry every client shares, so they must not read a
+    # lagging replica; hits never touch the session
     session: AsyncSession = Depends(get_session),
     token_details: dict = Depends(access_token_bearer),
 ):
-    books = await book_service.find_all(session)
+    fields = parse_book_fields(fields)
+
+    async def load():
+        books, next_cursor = await book_service.find_all(session, limit, cursor, fields)
+        items = [book_projection.dump(book, fields) for book in books]
+
+        return to_json({"items": items, "next_cursor": next_cursor}).decode()
+
+    key = await book_list_key(limit, cursor, fields)
+    payload = await book_cache.get_or_set(key, load)
+
+    return Response(content=payload, media_type="application/json")
+
+
+@book_router.get(
+    "/search",
+    response_model=BookSearchPageModel,
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+)
+async def search(
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    language: Optional[str] = None,
+    published_from: Optional[date] = None,
+    published_to: Optional[date] = None,
+    session: AsyncSession = Depends(get_read_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    books, next_cursor = await book_service.search(
+        session, q, limit, cursor, language, published_from, published_to
+    )
 
-    return books
+    return json_response(
+        BookSearchPageModel, {"items": books, "next_cursor": next_cursor}
+    )
+
+
+@book_router.get(
+    "/browse",
+    response_model=BookBrowseModel,
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+)
+async def browse(
+    language: Optional[str] = None,
+    publisher: Optional[str] = None,
+    author: Optional[str] = None,
+    decade: Optional[int] = Query(None, ge=1000, le=9980, multiple_of=10),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    session: AsyncSession = Depends(get_read_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    fields = parse_book_fields(fields)
+    books, next_cursor = await book_service.browse(
+        session, limit, cursor, language, publisher, author, decade, fields
+    )
+    facets = await get_facet_counts(session, language, publisher, author, decade)
+    items = [book_projection.dump(book, fields) for book in books]
+
+    return Response(
+        content=to_json({"items": items, "next_cursor": next_cursor, "facets": facets}),
+        media_type="application/json",
+    )
+
+
+@book_router.get(
+    "/autocomplete",
+    response_model=List[BookSuggestionModel],
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+)
+async def autocomplete_books(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    token_details: dict = Depends(access_token_bearer),
+):
+    if not autocomplete.enabled:
+        # otherwise it would never become ready and always answer 503
+        raise AutocompleteDisabled()
+    if not autocomplete.ready:
+        raise ServiceBusy()
+
+    return json_response(
+        List[BookSuggestionModel],
+        [{"text": text, "kind": kind} for text, kind in autocomplete.search(q, limit)],
+    )
 
 
 @book_router.get(
     "/user/{user_id}",
-    response_model=List[BookModel],
+    response_model=BookPageModel,
     status_code=status.HTTP_200_OK,
     dependencies=[role_checker],
 )
 async def get_user_book_submissions(
     user_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     session: AsyncSession = Depends(get_session),
     token_details: dict = Depends(access_token_bearer),
 ):
-    books = await book_service.get_user_books(session, user_id)
+    fields = parse_book_fields(fields)
 
-    return books
+    async def load():
+        books, next_cursor = await book_service.get_user_books(
+            session, user_id, limit, cursor, fields
+        )
+        items = [book_projection.dump(book, fields) for book in books]
+
+        return to_json({"items": items, "next_cursor": next_cursor}).decode()
+
+    key = await user_books_key(user_id, limit, cursor, fields)
+    payload = await book_cache.get_or_set(key, load)
+
+    return Response(content=payload, media_type="application/json")
 
 
 @book_router.post(
@@ -63,7 +199,109 @@ async def create(
 ):
     user_id = token_details.get("user")["id"]
     new_book = await book_service.create(session, book_data, user_id)
-    return new_book
+    return json_response(BookModel, new_book, status_code=status.HTTP_201_CREATED)
+
+
+@book_router.post(
+    "/import",
+    response_model=BookImportResultModel,
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def import_books(
+    request: Request,
+    import_id: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    user_id = token_details.get("user")["id"]
+
+    result = await book_import_service.import_books(
+        session,
+        request.stream(),
+        request.headers.get("content-type", ""),
+        user_id,
+        import_id,
+    )
+
+    return json_response(BookImportResultModel, result, trusted=True)
+
+
+@book_router.post(
+    "/batch",
+    response_model=BookBatchModel,
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+)
+async def find_many(
+    batch: BookBatchRequestModel,
+    session: AsyncSession = Depends(get_read_session),
+    token_details: dict = Depends(access_token_bearer),
+):
+    book_ids = list(dict.fromkeys(batch.ids))
+    books = await book_service.get_books_by_ids(session, book_ids)
+    found = [book_id for book_id in book_ids if book_id in books]
+
+    reviews = {}
+    if batch.reviews_limit > 0 and found:
+        reviews = await review_service.get_latest_reviews(
+            session, found, batch.reviews_limit
+        )
+
+    items = []
+    for book_id in found:
+        book_reviews, next_cursor = reviews.get(book_id, ([], None))
+        detail = BookDetailModel.model_validate(
+            {**books[book_id].model_dump(), "reviews": []}
+        )
+        items.append(
+            detail.model_copy(
+                update={
+                    "reviews": [
+                        ReviewModel.model_validate(r, from_attributes=True)
+                        for r in book_reviews
+                    ],
+                    "reviews_next_cursor": next_cursor,
+                }
+            )
+        )
+
+    batch = BookBatchModel(
+        items=items,
+        missing=[book_id for book_id in book_ids if book_id not in books],
+    )
+
+    return json_response(BookBatchModel, batch, trusted=True)
+
+
+@book_router.get(
+    "/export",
+    status_code=status.HTTP_200_OK,
+    dependencies=[role_checker],
+    response_class=StreamingResponse,
+)
+async def export(
+    format: ExportFormat = "ndjson",
+    user_id: Optional[str] = None,
+    language: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    token_details: dict = Depends(access_token_bearer),
+):
+    return StreamingResponse(
+        export_books(format, user_id, language, created_from, created_to),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="books.{format}"'},
+    )
 
 
 @book_router.get(
@@ -74,13 +312,46 @@ async def create(
 )
 async def find_one(
     book_id: str,
+    reviews_limit: Optional[int] = Query(None, ge=0, le=MAX_PAGE_SIZE),
     session: AsyncSession = Depends(get_session),
     token_details: dict = Depends(access_token_bearer),
 ):
-    book = await book_service.get_book_by_id(session, book_id)
-    if book is None:
-        raise BookNotFound()
-    return book
+    async def load():
+        if reviews_limit is None:
+            book = await book_service.get_book_by_id(
+                session, book_id, load_reviews=True
+            )
+            if book is None:
+                raise BookNotFound()
+
+            return BookDetailModel.model_validate(
+                book, from_attributes=True
+            ).model_dump_json()
+
+        book = await book_service.get_book_by_id(session, book_id)
+        if book is None:
+            raise BookNotFound()
+
+        reviews, next_cursor = [], None
+        if reviews_limit > 0:
+            reviews, next_cursor = await review_service.get_book_reviews(
+                session, book_id, reviews_limit
+            )
+        detail = BookDetailModel.model_validate(book, from_attributes=True)
+
+        return detail.model_copy(
+            update={
+                "reviews": [
+                    ReviewModel.model_validate(r, from_attributes=True) for r in reviews
+                ],
+                "reviews_next_cursor": next_cursor,
+            }
+        ).model_dump_json()
+
+    key = await book_detail_key(book_id, reviews_limit)
+    payload = await book_cache.get_or_set(key, load)
+
+    return Response(content=payload, media_type="application/json")
 
 
 @book_router.patch(
@@ -98,7 +369,7 @@ async def update(
     updated_book = await book_service.update(session, book_id, book_update_data)
     if updated_book is None:
         raise BookNotFound()
-    return updated_book
+    return json_response(BookModel, updated_book)
 
 
 @book_router.delete(
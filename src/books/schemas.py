@@ -1,9 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, computed_field
 from datetime import datetime, date
-from typing import List
+from typing import List, Literal, Optional, Union
 from src.reviews.schemas import ReviewModel
 
 
+def average_rating(review_count: int, rating_sum: int) -> Optional[float]:
+    if not review_count:
+        return None
+
+    return round(rating_sum / review_count, 2)
+
+
 class BookModel(BaseModel):
     id: str
     title: str
@@ -14,10 +21,67 @@ class BookModel(BaseModel):
     language: str
     created_at: datetime
     updated_at: datetime
+    review_count: int = 0
+    rating_sum: int = Field(default=0, exclude=True)
+
+    @computed_field
+    @property
+    def average_rating(self) -> Optional[float]:
+        return average_rating(self.review_count, self.rating_sum)
 
 
 class BookDetailModel(BookModel):
+    rating_histogram: List[int]
     reviews: List[ReviewModel]
+    reviews_next_cursor: Optional[str] = None
+
+
+class BookPageModel(BaseModel):
+    items: List[BookModel]
+    next_cursor: Optional[str] = None
+
+
+class BookBatchRequestModel(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=200)
+    reviews_limit: int = Field(default=0, ge=0, le=10)
+
+
+class BookBatchModel(BaseModel):
+    items: List[BookDetailModel]
+    missing: List[str]
+
+
+class BookSearchResultModel(BookModel):
+    rank: float
+    headline: str
+
+
+class BookSearchPageModel(BaseModel):
+    items: List[BookSearchResultModel]
+    next_cursor: Optional[str] = None
+
+
+class FacetCountModel(BaseModel):
+    value: Union[int, str]
+    count: int
+
+
+class BookFacetsModel(BaseModel):
+    language: List[FacetCountModel]
+    publisher: List[FacetCountModel]
+    author: List[FacetCountModel]
+    decade: List[FacetCountModel]
+    # when the book table was read; None if the view's refresh is unrecorded
+    refreshed_at: Optional[datetime]
+
+
+class BookBrowseModel(BookPageModel):
+    facets: BookFacetsModel
+
+
+class BookSuggestionModel(BaseModel):
+    text: str
+    kind: Literal["title", "author"]
 
 
 class BookCreateModel(BaseModel):
@@ -35,3 +99,20 @@ class BookUpdateModel(BaseModel):
     publisher: str
     page_count: int
     language: str
+
+
+class BookImportErrorModel(BaseModel):
+    row: int
+    errors: List[str]
+
+
+class BookImportResultModel(BaseModel):
+    import_id: str
+    resumed_from: int
+    rows: int
+    inserted: int
+    failed: int
+    errors: List[BookImportErrorModel]
+    errors_truncated: bool
+    elapsed_seconds: float
+    rows_per_second: float
@@ -1,26 +1,168 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
-from .schemas import BookCreateModel, BookUpdateModel
-from src.db.models import Book
-from sqlmodel import select, desc
+from .schemas import BookCreateModel, BookUpdateModel, average_rating
+from src.db.models import Book, BOOK_SEARCH_CONFIG, book_search_vector
+from src.db.pagination import decode_cursor, encode_cursor, paginate
+from src.db.projection import Projection
+from .cache import invalidate_book
+from .autocomplete import current_xact_id, publish_book_changes
+from sqlmodel import select
+from sqlalchemy import Float, any_, desc, func, literal, tuple_
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy.orm import selectinload
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+BOOK_ORDERING = (Book.created_at, Book.id)
+SEARCH_HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, HighlightAll=true"
+
+# the fields of BookModel
+book_projection = Projection(
+    {
+        "id": [Book.id],
+        "title": [Book.title],
+        "author": [Book.author],
+        "publisher": [Book.publisher],
+        "published_date": [Book.published_date],
+        "page_count": [Book.page_count],
+        "language": [Book.language],
+        "created_at": [Book.created_at],
+        "updated_at": [Book.updated_at],
+        "review_count": [Book.review_count],
+        "average_rating": [Book.review_count, Book.rating_sum],
+    },
+    computed={
+        "average_rating": lambda row: average_rating(
+            row["review_count"], row["rating_sum"]
+        )
+    },
+)
+
+
+def select_books(fields: Optional[Sequence[str]] = None):
+    """All of a book, or only the columns behind ``fields``."""
+    if fields is None:
+        return select(Book)
+
+    return book_projection.statement(fields, *BOOK_ORDERING)
 
 
 class BookService:
-    async def find_all(self, session: AsyncSession):
-        statement = select(Book).order_by(desc(Book.created_at))
-        result = await session.exec(statement)
+    async def find_all(
+        self,
+        session: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ):
+        statement = select_books(fields)
+
+        return await paginate(session, statement, BOOK_ORDERING, limit, cursor)
+
+    async def get_user_books(
+        self,
+        session: AsyncSession,
+        user_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ):
+        statement = select_books(fields).where(Book.user_id == user_id)
 
-        return result.all()
+        return await paginate(session, statement, BOOK_ORDERING, limit, cursor)
 
-    async def get_user_books(self, session: AsyncSession, user_id: str):
-        statement = (
-            select(Book).where(Book.user_id == user_id).order_by(desc(Book.created_at))
+    async def browse(
+        self,
+        session: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+        language: Optional[str] = None,
+        publisher: Optional[str] = None,
+        author: Optional[str] = None,
+        decade: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+    ):
+        statement = select_books(fields)
+        if language is not None:
+            statement = statement.where(Book.language == language)
+        if publisher is not None:
+            statement = statement.where(Book.publisher == publisher)
+        if author is not None:
+            statement = statement.where(Book.author == author)
+        if decade is not None:
+            statement = statement.where(
+                Book.published_date >= date(decade, 1, 1),
+                Book.published_date < date(decade + 10, 1, 1),
+            )
+
+        return await paginate(session, statement, BOOK_ORDERING, limit, cursor)
+
+    async def search(
+        self,
+        session: AsyncSession,
+        q: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        language: Optional[str] = None,
+        published_from: Optional[date] = None,
+        published_to: Optional[date] = None,
+    ):
+        """Ranked full-text search, paginated on (rank, id)."""
+        config = literal(BOOK_SEARCH_CONFIG, pg.REGCONFIG)
+        query = func.websearch_to_tsquery(config, q)
+        rank = func.ts_rank(book_search_vector, query, type_=Float)
+        ordering = (rank.label("rank"), Book.id)
+
+        statement = select(*Book.__table__.c, ordering[0]).where(
+            book_search_vector.op("@@")(query)
         )
-        result = await session.exec(statement)
+        if language is not None:
+            statement = statement.where(Book.language == language)
+        if published_from is not None:
+            statement = statement.where(Book.published_date >= published_from)
+        if published_to is not None:
+            statement = statement.where(Book.published_date <= published_to)
+        if cursor is not None:
+            values = decode_cursor(cursor, ordering)
+            statement = statement.where(tuple_(rank, Book.id) < tuple_(*values))
+        page = statement.order_by(desc(rank), desc(Book.id)).limit(limit + 1).subquery()
+
+        # headlines are costly, so only build them for the rows on this page
+        headline = func.ts_headline(
+            config,
+            func.concat_ws(" — ", page.c.title, page.c.author, page.c.publisher),
+            query,
+            SEARCH_HEADLINE_OPTIONS,
+        )
+        result = await session.exec(
+            select(page, headline.label("headline")).order_by(
+                desc(page.c.rank), desc(page.c.id)
+            )
+        )
+        rows = result.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1].rank, rows[-1].id])
+
+        return rows, next_cursor
 
-        return result.all()
+    async def get_books_by_ids(
+        self, session: AsyncSession, book_ids: List[str]
+    ) -> Dict[str, Book]:
+        # one array parameter, so the statement is the same for any number of ids
+        ids = literal(book_ids, pg.ARRAY(pg.VARCHAR))
+        result = await session.exec(select(Book).where(Book.id == any_(ids)))
 
-    async def get_book_by_id(self, session: AsyncSession, book_id: str):
+        return {book.id: book for book in result.all()}
+
+    async def get_book_by_id(
+        self, session: AsyncSession, book_id: str, load_reviews: bool = False
+    ):
         statement = select(Book).where(Book.id == book_id)
+        if load_reviews:
+            statement = statement.options(selectinload(Book.reviews))
+            statement = statement.execution_options(populate_existing=True)
         result = await session.exec(statement)
         book = result.first()
 
@@ -37,33 +179,57 @@ class BookService:
         new_book.user_id = user_id
 
         session.add(new_book)
+        xid = await current_xact_id(session)
         await session.commit()
         await session.refresh(new_book)
+        await invalidate_book(new_book.id, user_id)
+        await publish_book_changes((new_book.title, new_book.author, 1), xid=xid)
 
         return new_book
 
     async def update(
         self, session: AsyncSession, book_id: str, update_data: BookUpdateModel
     ):
-        book_to_update = await self.find_one(session, book_id)
+        book_to_update = await self.get_book_by_id(session, book_id)
 
         if book_to_update is not None:
+            previous = (book_to_update.title, book_to_update.author)
             update_data_dict = update_data.model_dump()
             for k, v in update_data_dict.items():
                 setattr(book_to_update, k, v)
+            xid = await current_xact_id(session)
             await session.commit()
             await session.refresh(book_to_update)
+            await invalidate_book(book_id, book_to_update.user_id)
+
+            current = (book_to_update.title, book_to_update.author)
+            if current != previous:
+                weight = 1 + book_to_update.review_count
+                await publish_book_changes(
+                    (*previous, -weight), (*current, weight), xid=xid
+                )
 
             return book_to_update
         else:
             return None
 
     async def delete(self, session: AsyncSession, book_id: str):
-        book_to_delete = await self.find_one(session, book_id)
+        # reviews must be loaded so the unit of work can detach them
+        book_to_delete = await self.get_book_by_id(session, book_id, load_reviews=True)
 
         if book_to_delete is not None:
             await session.delete(book_to_delete)
+            xid = await current_xact_id(session)
             await session.commit()
+            await invalidate_book(book_id, book_to_delete.user_id)
+            await publish_book_changes(
+                (
+                    book_to_delete.title,
+                    book_to_delete.author,
+                    -(1 + book_to_delete.review_count),
+                ),
+                xid=xid,
+            )
 
             return {}
         else:
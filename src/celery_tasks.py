@@ -1,6 +1,15 @@
 from celery import Celery
+from src.config import Config
 from src.mail import mail, create_message
+from src.metrics import CELERY_ENQUEUE_DURATION
+from src.reviews.service import ReviewService
+from src.books.facets import refresh_facets
 from asgiref.sync import async_to_sync
+from contextlib import asynccontextmanager
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from sqlmodel.ext.asyncio.session import AsyncSession
+import time
 
 c_app = Celery()
 c_app.config_from_object("src.config")
@@ -12,3 +21,44 @@ def send_email(recipients: list[str], subject: str, body: str):
 
     async_to_sync(mail.send_message)(message)
     print("Email sent successfully")
+
+
+@asynccontextmanager
+async def task_session():
+    # every task runs on a fresh event loop, so pooled connections cannot be reused
+    engine = create_async_engine(Config.DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+    finally:
+        await engine.dispose()
+
+
+async def _reconcile_review_aggregates() -> list[str]:
+    async with task_session() as session:
+        return await ReviewService().reconcile_aggregates(session)
+
+
+@c_app.task()
+def reconcile_review_aggregates():
+    return async_to_sync(_reconcile_review_aggregates)()
+
+
+def enqueue(task, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return task.delay(*args, **kwargs)
+    finally:
+        CELERY_ENQUEUE_DURATION.labels(task=task.name).observe(
+            time.perf_counter() - start
+        )
+
+
+async def _refresh_book_facets() -> None:
+    async with task_session() as session:
+        await refresh_facets(session)
+
+
+@c_app.task()
+def refresh_book_facets():
+    async_to_sync(_refresh_book_facets)()
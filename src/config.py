@@ -1,11 +1,48 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import List
 
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5
+    REPLICA_HEALTH_CHECK_INTERVAL: float = 5
+    READ_YOUR_WRITES_SECONDS: int = 10
     JWT_SECRET: str
     JWT_ALGORITHM: str
     REDIS_URL: str = "redis://localhost:6379/0"
+    BOOK_CACHE_TTL: int = 60
+    BOOK_CACHE_STALE_TTL: int = 300
+    CACHE_LOCK_TIMEOUT: float = 5
+    LOCAL_CACHE_ENABLED: bool = True
+    LOCAL_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    LOCAL_CACHE_TTL: float = 30
+    REVOCATION_FILTER_ENABLED: bool = True
+    REVOCATION_FILTER_CAPACITY: int = 1_000_000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_QUEUE_SIZE: int = 10_000
+    ACCESS_LOG_BATCH_SIZE: int = 256
+    SQL_PROFILING: bool = False
+    SQL_PROFILING_N_PLUS_ONE_THRESHOLD: int = 3
+    SQL_PROFILING_HISTORY: int = 100
+    REVIEW_AGGREGATES_RECONCILE_INTERVAL: float = 3600
+    BOOK_IMPORT_BATCH_SIZE: int = 1000
+    BOOK_IMPORT_MAX_REPORTED_ERRORS: int = 1000
+    BOOK_IMPORT_PROGRESS_TTL: int = 24 * 3600
+    BOOK_IMPORT_MAX_CSV_RECORD_SIZE: int = 64 * 1024
+    AUTOCOMPLETE_ENABLED: bool = True
+    BOOK_FACETS_MAX_STALENESS: int = 600
+    # at most FACET_VALUES_PER_SCOPE, the values book_facet_counts keeps
+    BOOK_FACETS_LIMIT: int = 20
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
     MAIL_FROM: str
@@ -17,6 +54,9 @@ class Settings(BaseSettings):
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
     DOMAIN: str
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_USE_PROCESSES: bool = False
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -29,3 +69,15 @@ Config = Settings()
 broker_url = Config.REDIS_URL
 result_backend = Config.REDIS_URL
 broker_connection_retry_on_startup = True
+beat_schedule = {
+    "reconcile-review-aggregates": {
+        "task": "src.celery_tasks.reconcile_review_aggregates",
+        "schedule": Config.REVIEW_AGGREGATES_RECONCILE_INTERVAL,
+    },
+    # the other half of the staleness bound is left for the refresh itself;
+    # cached counts are keyed by the view's generation and never outlive it
+    "refresh-book-facets": {
+        "task": "src.celery_tasks.refresh_book_facets",
+        "schedule": Config.BOOK_FACETS_MAX_STALENESS / 2,
+    },
+}
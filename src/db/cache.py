@@ -0,0 +1,168 @@
+from typing import Awaitable, Callable, Dict, Optional
+from src.db.redis import redis_client
+from src.db.local_cache import local_cache, invalidate
+from src.metrics import CACHE_REQUESTS
+import asyncio
+import time
+
+Loader = Callable[[], Awaitable[str]]
+
+
+class ResponseCache:
+    """Caches serialized responses in Redis with stale-while-revalidate.
+
+    Entries are stored as ``<fresh_until>|<payload>`` and kept in Redis for
+    ``ttl + stale_ttl`` seconds. Once an entry goes stale the one caller that
+    wins the refresh lock reloads it while everyone else keeps serving the
+    stale copy. Concurrent misses for the same key share one load per
+    process, and other processes wait briefly for the lock holder to fill
+    the key instead of stampeding the database.
+
+    Fresh entries and generation counters are also kept in the in-process
+    ``local_cache``, so hot keys are served without a Redis round trip.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: int,
+        stale_ttl: int,
+        lock_timeout: float,
+        prefix: str = "cache:",
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.prefix = prefix
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{self.name}:{key}"
+
+    async def _store(self, key: str, payload: str) -> bytes:
+        fresh_until = time.time() + self.ttl
+        payload = payload.encode()
+        await redis_client.set(
+            self._key(key),
+            f"{fresh_until}|".encode() + payload,
+            ex=self.ttl + self.stale_ttl,
+        )
+        local_cache.set(self._key(key), payload, ttl=self.ttl)
+
+        return payload
+
+    async def _acquire_lock(self, key: str) -> bool:
+        return await redis_client.set(
+            self._key(key) + ":lock",
+            "",
+            nx=True,
+            px=int(self.lock_timeout * 1000),
+        )
+
+    async def _release_lock(self, key: str) -> None:
+        await redis_client.delete(self._key(key) + ":lock")
+
+    async def _read(self, key: str):
+        epoch = local_cache.epoch
+        raw = await redis_client.get(self._key(key))
+        if raw is None:
+            return None, False
+
+        fresh_until, payload = raw.split(b"|", 1)
+        fresh_for = float(fresh_until) - time.time()
+        if fresh_for > 0:
+            local_cache.set(self._key(key), payload, ttl=fresh_for, epoch=epoch)
+
+        return payload, fresh_for > 0
+
+    async def _wait_for_fill(self, key: str) -> Optional[bytes]:
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+            payload, _ = await self._read(key)
+            if payload is not None:
+                return payload
+
+        return None
+
+    async def _load(self, key: str, loader: Loader) -> bytes:
+        locked = await self._acquire_lock(key)
+        if not locked:
+            payload = await self._wait_for_fill(key)
+            if payload is not None:
+                return payload
+
+        try:
+            return await self._store(key, await loader())
+        finally:
+            if locked:
+                await self._release_lock(key)
+
+    async def get_or_set(self, key: str, loader: Loader) -> bytes:
+        payload = local_cache.get(self._key(key))
+        if payload is not None:
+            CACHE_REQUESTS.labels(cache=self.name, result="local_hit").inc()
+            return payload
+
+        payload, fresh = await self._read(key)
+
+        if payload is not None:
+            if fresh:
+                CACHE_REQUESTS.labels(cache=self.name, result="hit").inc()
+                return payload
+
+            CACHE_REQUESTS.labels(cache=self.name, result="stale").inc()
+            if await self._acquire_lock(key):
+                try:
+                    return await self._store(key, await loader())
+                finally:
+                    await self._release_lock(key)
+
+            return payload
+
+        CACHE_REQUESTS.labels(cache=self.name, result="miss").inc()
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            payload = await self._load(key, loader)
+            future.set_result(payload)
+            return payload
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # followers re-raise it; keep the loop from warning when there are none
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            keys = [self._key(k) for k in keys]
+            await redis_client.delete(*keys)
+            await invalidate(*keys)
+
+    async def get_generation(self, name: str) -> int:
+        key = self._key(f"gen:{name}")
+        generation = local_cache.get(key)
+        if generation is None:
+            epoch = local_cache.epoch
+            generation = int(await redis_client.get(key) or 0)
+            local_cache.set(key, generation, epoch=epoch)
+
+        return generation
+
+    async def bump_generation(self, *names: str) -> None:
+        keys = [self._key(f"gen:{name}") for name in names]
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.incr(key)
+            await pipe.execute()
+        await invalidate(*keys)
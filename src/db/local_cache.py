@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+from src.config import Config
+from src.db.pubsub import pubsub_listener, publish
+from src.metrics import LOCAL_CACHE_BYTES, LOCAL_CACHE_EVENTS
+import sys
+import time
+
+INVALIDATION_CHANNEL = "bookly:cache:invalidate"
+
+
+class LocalCache:
+    """Per-process LRU cache with per-entry TTLs, bounded by size in bytes.
+
+    Sizes are estimated with ``sys.getsizeof`` of the key and value, which is
+    exact for the str/bytes/int values stored here. Lookups miss while
+    ``coherent()`` is false, i.e. while invalidations cannot reach us.
+
+    ``epoch`` advances on every invalidation. A caller that reads a value
+    from Redis passes the epoch it saw before the read to ``set``, which
+    drops the value if an invalidation arrived in between, as it may
+    already be stale.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        enabled: bool = True,
+        coherent: Callable[[], bool] = lambda: True,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self.coherent = coherent
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.epoch = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled or not self.coherent():
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            LOCAL_CACHE_EVENTS.labels(event="miss").inc()
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        LOCAL_CACHE_EVENTS.labels(event="hit").inc()
+
+        return entry[1]
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        epoch: Optional[int] = None,
+    ) -> None:
+        if not self.enabled or (epoch is not None and epoch != self.epoch):
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, value, size)
+        self.size += size
+
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+            LOCAL_CACHE_EVENTS.labels(event="eviction").inc()
+
+        LOCAL_CACHE_BYTES.set(self.size)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    def delete(self, *keys: str) -> None:
+        self.epoch += 1
+        for key in keys:
+            self._remove(key)
+        LOCAL_CACHE_BYTES.set(self.size)
+
+    def clear(self) -> None:
+        self.epoch += 1
+        self._entries.clear()
+        self.size = 0
+        LOCAL_CACHE_BYTES.set(0)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+local_cache = LocalCache(
+    max_bytes=Config.LOCAL_CACHE_MAX_BYTES,
+    ttl=Config.LOCAL_CACHE_TTL,
+    enabled=Config.LOCAL_CACHE_ENABLED,
+    coherent=lambda: pubsub_listener.connected,
+)
+
+
+async def invalidate(*keys: str) -> None:
+    """Drop keys from this worker's cache and every other worker's."""
+    local_cache.delete(*keys)
+    if local_cache.enabled and keys:
+        await publish(INVALIDATION_CHANNEL, "\n".join(keys))
+
+
+async def _on_invalidate(message: str) -> None:
+    local_cache.delete(*message.split("\n"))
+
+
+async def _on_connect() -> None:
+    # invalidations published while we were disconnected are gone
+    local_cache.clear()
+
+
+if local_cache.enabled:
+    pubsub_listener.subscribe(INVALIDATION_CHANNEL, _on_invalidate)
+    pubsub_listener.on_connect(_on_connect)
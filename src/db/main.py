@@ -1,11 +1,106 @@
+from fastapi import Request
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from src.config import Config
+from src.db.replicas import ReplicaRouter
+from src.db.profiling import record_query
+from src.metrics import DB_POOL_CHECKOUT_DURATION, DB_QUERY_DURATION
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+from uuid import uuid4
+import time
 
-async_engine = create_async_engine(Config.DATABASE_URL)
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# holds the time until which the client's reads must see its own writes
+PRIMARY_UNTIL_COOKIE = "bookly_primary_until"
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_DURATION.observe(time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    # the execution context lives exactly as long as the statement
+    context._query_start = time.perf_counter()
+
+
+def _record_query(statement, context, cursor, error=None):
+    duration = time.perf_counter() - context._query_start
+    # a statement is recorded once, even if fetching its rows fails later
+    del context._query_start
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+    DB_QUERY_DURATION.labels(operation=operation).observe(duration)
+    record_query(statement, duration, cursor, error)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    _record_query(statement, context, cursor)
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute never fires for a failed statement
+    context = exception_context.execution_context
+    if context is None or not hasattr(context, "_query_start"):
+        return
+    # the asyncpg adapter raises a generic error from the driver's own
+    error = exception_context.original_exception
+    error = error.__cause__ or error
+    _record_query(exception_context.statement, context, None, type(error).__name__)
+
+
+def build_engine(url: str) -> AsyncEngine:
+    statement_cache_size = Config.DB_STATEMENT_CACHE_SIZE
+    connect_args = {}
+
+    if Config.DB_PGBOUNCER_TRANSACTION_MODE:
+        # server-side prepared statements do not survive transaction pooling
+        statement_cache_size = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+
+    connect_args["statement_cache_size"] = statement_cache_size
+    connect_args["prepared_statement_cache_size"] = statement_cache_size
+
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_MAX_OVERFLOW,
+        pool_timeout=Config.DB_POOL_TIMEOUT,
+        pool_pre_ping=Config.DB_POOL_PRE_PING,
+        pool_recycle=Config.DB_POOL_RECYCLE,
+        connect_args=connect_args,
+    )
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+    return engine
+
+
+async_engine = build_engine(Config.DATABASE_URL)
+
+async_session_maker = sessionmaker(
+    bind=async_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+replica_router = ReplicaRouter(
+    Config.DATABASE_REPLICA_URLS,
+    engine_factory=build_engine,
+    max_lag=Config.REPLICA_MAX_LAG_SECONDS,
+    check_interval=Config.REPLICA_HEALTH_CHECK_INTERVAL,
+)
 
 
 async def init_db():
@@ -13,10 +108,84 @@ async def init_db():
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    Session = sessionmaker(
-        bind=async_engine, class_=AsyncSession, expire_on_commit=False
-    )
+def reads_from_primary(request: Request) -> bool:
+    try:
+        until = float(request.cookies.get(PRIMARY_UNTIL_COOKIE, 0))
+    except ValueError:
+        return False
+
+    # a forged far-future marker must not pin a client to the primary
+    now = time.time()
+
+    return now < until <= now + Config.READ_YOUR_WRITES_SECONDS
+
+
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    if request.method not in SAFE_METHODS:
+        # ReadYourWritesMiddleware hands the client a marker with the response
+        request.state.wrote_to_primary = True
+
+    async with async_session_maker() as session:
+        yield session
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    replica = None
+    if replica_router.enabled and not reads_from_primary(request):
+        replica = replica_router.pick()
+
+    if replica is None:
+        async with async_session_maker() as session:
+            yield session
+        return
 
-    async with Session() as session:
+    async with replica.session_maker() as session:
+        try:
+            yield session
+        except DBAPIError as e:
+            if e.connection_invalidated:
+                replica_router.mark_unhealthy(replica)
+            raise
+
+
+@asynccontextmanager
+async def open_read_session() -> AsyncGenerator[AsyncSession, None]:
+    # for work that outlives the request's dependencies, e.g. streamed bodies
+    replica = replica_router.pick()
+    session_maker = replica.session_maker if replica else async_session_maker
+
+    async with session_maker() as session:
         yield session
+
+
+class ReadYourWritesMiddleware:
+    """Keeps a client on the primary until its write has reached the replicas.
+
+    Successful writes set a cookie holding the time until which the client's
+    reads skip the replicas, so a read decides without asking Redis.
+    """
+
+    def __init__(self, app: ASGIApp, seconds: int):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] < 400
+                and scope.get("state", {}).get("wrote_to_primary")
+            ):
+                until = time.time() + self.seconds
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{PRIMARY_UNTIL_COOKIE}={until:.3f}; Max-Age={self.seconds}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,9 +1,12 @@
 from typing import List, Optional
-from sqlmodel import SQLModel, Field, Column, Relationship
+from sqlmodel import SQLModel, Field, Column, Relationship, Index
+from sqlalchemy import DDL, MetaData, Table, event, literal_column
 from cuid import cuid
 from datetime import date, datetime, timezone
 import sqlalchemy.dialects.postgresql as pg
 
+RATING_LEVELS = 5
+
 
 class User(SQLModel, table=True):
     __tablename__ = "user"
@@ -17,7 +20,9 @@ class User(SQLModel, table=True):
         ),
     )
     username: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
-    email: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    email: str = Field(
+        sa_column=Column(pg.VARCHAR, nullable=False, unique=True, index=True)
+    )
     first_name: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
     last_name: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
     role: str = Field(
@@ -47,10 +52,10 @@ class User(SQLModel, table=True):
         ),
     )
     books: List["Book"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "noload"}
     )
     reviews: List["Review"] = Relationship(
-        back_populates="user", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="user", sa_relationship_kwargs={"lazy": "noload"}
     )
 
     def __repr__(self) -> str:
@@ -59,6 +64,13 @@ class User(SQLModel, table=True):
 
 class Book(SQLModel, table=True):
     __tablename__ = "book"
+    __table_args__ = (
+        Index("ix_book_created_at_id", "created_at", "id"),
+        Index("ix_book_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_book_language_created_at_id", "language", "created_at", "id"),
+        Index("ix_book_publisher_created_at_id", "publisher", "created_at", "id"),
+        Index("ix_book_author_created_at_id", "author", "created_at", "id"),
+    )
 
     id: str = Field(
         default_factory=cuid,
@@ -75,6 +87,22 @@ class Book(SQLModel, table=True):
     page_count: int = Field(sa_column=Column(pg.INTEGER, nullable=False))
     language: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
     user_id: Optional[str] = Field(default=None, foreign_key="user.id")
+    review_count: int = Field(
+        default=0,
+        sa_column=Column(pg.INTEGER, nullable=False, server_default="0"),
+    )
+    rating_sum: int = Field(
+        default=0,
+        sa_column=Column(pg.INTEGER, nullable=False, server_default="0"),
+    )
+    rating_histogram: List[int] = Field(
+        default_factory=lambda: [0] * RATING_LEVELS,
+        sa_column=Column(
+            pg.ARRAY(pg.INTEGER, zero_indexes=True),
+            nullable=False,
+            server_default="{" + ",".join(["0"] * RATING_LEVELS) + "}",
+        ),
+    )
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
         sa_column=Column(
@@ -94,15 +122,158 @@ class Book(SQLModel, table=True):
     )
     user: Optional["User"] = Relationship(back_populates="books")
     reviews: List["Review"] = Relationship(
-        back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
+        back_populates="book", sa_relationship_kwargs={"lazy": "noload"}
     )
 
     def __repr__(self) -> str:
         return f"<Book {self.title}>"
 
 
+BOOK_SEARCH_CONFIG = "simple"
+BOOK_SEARCH_DOCUMENT = (
+    f"setweight(to_tsvector('{BOOK_SEARCH_CONFIG}', NEW.title), 'A') || "
+    f"setweight(to_tsvector('{BOOK_SEARCH_CONFIG}', NEW.author), 'B') || "
+    f"setweight(to_tsvector('{BOOK_SEARCH_CONFIG}', NEW.publisher), 'C')"
+)
+
+# Maintained by a trigger and deliberately left out of the mapping, so that
+# loading a Book never drags the tsvector along. A trigger rather than a
+# generated column, which could not be added without rewriting the table.
+book_search_vector = literal_column("book.search_vector", type_=pg.TSVECTOR)
+
+event.listen(
+    Book.__table__,
+    "after_create",
+    DDL("ALTER TABLE book ADD COLUMN search_vector tsvector").execute_if(
+        dialect="postgresql"
+    ),
+)
+event.listen(
+    Book.__table__,
+    "after_create",
+    DDL(
+        "CREATE OR REPLACE FUNCTION book_search_vector_update() RETURNS trigger "
+        "LANGUAGE plpgsql AS $$ BEGIN "
+        f"NEW.search_vector := {BOOK_SEARCH_DOCUMENT}; "
+        "RETURN NEW; END $$"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Book.__table__,
+    "after_create",
+    DDL(
+        "CREATE TRIGGER book_search_vector_update "
+        "BEFORE INSERT OR UPDATE OF title, author, publisher ON book "
+        "FOR EACH ROW EXECUTE FUNCTION book_search_vector_update()"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Book.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX ix_book_search_vector ON book USING gin (search_vector)"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+BOOK_DECADE = "(extract(year FROM published_date)::int / 10) * 10"
+
+# The filters each facet's counts are pre-aggregated under. Languages and
+# decades are few, so every combination of them stays small; publishers and
+# authors are not, and a filter on either is answered from the book table
+# through its index instead.
+FACET_SCOPES = {
+    "language": ("decade",),
+    "publisher": ("language", "decade"),
+    "author": ("language", "decade"),
+    "decade": ("language",),
+}
+# Only the top values of a facet are ever shown, and keeping every author in
+# every scope would make the view about as large as book itself.
+FACET_VALUES_PER_SCOPE = 100
+
+
+def _facet_counts_query(facet: str, scopes: tuple) -> str:
+    grouping_sets = [(facet,)]
+    for scope in scopes:
+        grouping_sets += [(*s, scope) for s in grouping_sets]
+    # e.g. "language=en|decade=1990", "" when unfiltered
+    scope = ", ".join(
+        f"CASE WHEN GROUPING({c}) = 0 THEN '{c}=' || {c} END" for c in scopes
+    )
+
+    return (
+        f"SELECT '{facet}'::text AS facet, concat_ws('|', {scope}) AS scope, "
+        f"{facet}::text AS value, count(*)::int AS book_count "
+        "FROM facet_books GROUP BY GROUPING SETS ("
+        + ", ".join(f"({', '.join(s)})" for s in grouping_sets)
+        + ")"
+    )
+
+
+BOOK_FACET_COUNTS_QUERY = (
+    "WITH facet_books AS ("
+    f"SELECT language, publisher, author, {BOOK_DECADE} AS decade FROM book) "
+    "SELECT facet, scope, value, book_count FROM ("
+    "SELECT *, row_number() OVER ("
+    "PARTITION BY facet, scope ORDER BY book_count DESC, value) AS rank FROM ("
+    + " UNION ALL ".join(
+        _facet_counts_query(facet, scopes) for facet, scopes in FACET_SCOPES.items()
+    )
+    + f") AS counts) AS ranked WHERE rank <= {FACET_VALUES_PER_SCOPE}"
+)
+
+# Book counts per facet value and scope, refreshed on a schedule instead of
+# grouping the whole book table per request. Kept off SQLModel.metadata so
+# create_all does not mistake it for a table.
+book_facet_counts = Table(
+    "book_facet_counts",
+    MetaData(),
+    Column("facet", pg.TEXT),
+    Column("scope", pg.TEXT),
+    Column("value", pg.TEXT),
+    Column("book_count", pg.INTEGER),
+)
+
+event.listen(
+    Book.__table__,
+    "after_create",
+    DDL(
+        f"CREATE MATERIALIZED VIEW book_facet_counts AS {BOOK_FACET_COUNTS_QUERY}"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Book.__table__,
+    "after_create",
+    # REFRESH ... CONCURRENTLY needs a unique index
+    DDL(
+        "CREATE UNIQUE INDEX ix_book_facet_counts_key "
+        "ON book_facet_counts (facet, scope, value)"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Book.__table__,
+    "after_create",
+    # the top values of a facet in a scope are a prefix of this index
+    DDL(
+        "CREATE INDEX ix_book_facet_counts_top "
+        "ON book_facet_counts (facet, scope, book_count DESC, value)"
+    ).execute_if(dialect="postgresql"),
+)
+
+
 class Review(SQLModel, table=True):
     __tablename__ = "review"
+    __table_args__ = (
+        Index("ix_review_book_id_created_at_id", "book_id", "created_at", "id"),
+        Index(
+            "ix_review_book_id_rating_created_at_id",
+            "book_id",
+            "rating",
+            "created_at",
+            "id",
+        ),
+    )
 
     id: str = Field(
         default_factory=cuid,
@@ -114,7 +285,7 @@ class Review(SQLModel, table=True):
     )
     rating: int = Field(sa_column=Column(pg.INTEGER, nullable=False), lt=5)
     review_text: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
-    user_id: Optional[str] = Field(default=None, foreign_key="user.id")
+    user_id: Optional[str] = Field(default=None, foreign_key="user.id", index=True)
     book_id: Optional[str] = Field(default=None, foreign_key="book.id")
     created_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
@@ -0,0 +1,75 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import desc, tuple_
+from src.errors import InvalidCursor
+import json
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps(
+        [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values],
+        separators=(",", ":"),
+    )
+
+    return urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise InvalidCursor()
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursor()
+
+    decoded = []
+    for column, value in zip(columns, values):
+        python_type = column.type.python_type
+        try:
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is date:
+                value = date.fromisoformat(value)
+            elif not isinstance(value, python_type):
+                value = python_type(value)
+        except (TypeError, ValueError):
+            raise InvalidCursor()
+        decoded.append(value)
+
+    return decoded
+
+
+async def paginate(
+    session: AsyncSession,
+    statement,
+    order_by: Sequence[Any],
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[list, Optional[str]]:
+    """Keyset pagination over ``order_by`` (all descending, last one unique).
+
+    The page boundary is a row comparison on the ordering columns, so deep
+    pages cost the same index range scan as the first one.
+    """
+    if cursor is not None:
+        values = decode_cursor(cursor, order_by)
+        statement = statement.where(tuple_(*order_by) < tuple_(*values))
+
+    statement = statement.order_by(*[desc(c) for c in order_by]).limit(limit + 1)
+    result = await session.exec(statement)
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in order_by])
+
+    return rows, next_cursor
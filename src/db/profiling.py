@@ -0,0 +1,155 @@
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.config import Config
+import re
+import time
+
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|\?|'(?:[^']|'')*'|\b\d+\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+current_profile: ContextVar[Optional["QueryProfile"]] = ContextVar(
+    "current_profile", default=None
+)
+
+
+def statement_shape(statement: str) -> str:
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _PLACEHOLDER_LIST.sub("?+", shape)
+
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class QueryProfile:
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.queries: List[dict] = []
+
+    def record(
+        self,
+        statement: str,
+        duration: float,
+        rowcount: int,
+        error: Optional[str] = None,
+    ) -> None:
+        self.queries.append(
+            {
+                "statement": statement,
+                "duration_ms": duration * 1000,
+                "rowcount": rowcount,
+                "error": error,
+            }
+        )
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(q["duration_ms"] for q in self.queries)
+
+    def repeated_shapes(self, threshold: int) -> Dict[str, int]:
+        """Statement shapes run at least ``threshold`` times, i.e. likely N+1."""
+        shapes = Counter(statement_shape(q["statement"]) for q in self.queries)
+
+        return {shape: n for shape, n in shapes.items() if n >= threshold}
+
+    def report(self, threshold: int) -> dict:
+        return {
+            "label": self.label,
+            "query_count": self.count,
+            "total_ms": self.total_ms,
+            "n_plus_one": self.repeated_shapes(threshold),
+            "queries": self.queries,
+        }
+
+
+def record_query(
+    statement: str, duration: float, cursor, error: Optional[str] = None
+) -> None:
+    profile = current_profile.get()
+    if profile is None:
+        return
+
+    if error is not None:
+        rowcount = 0
+    else:
+        rowcount = cursor.rowcount
+        if rowcount < 0:
+            # asyncpg's adapter buffers SELECT results but leaves rowcount at -1
+            rowcount = len(getattr(cursor, "_rows", ()))
+    profile.record(statement, duration, rowcount, error)
+
+
+@contextmanager
+def profile_queries(label: str = ""):
+    profile = QueryProfile(label)
+    token = current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        current_profile.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int, n_plus_one_threshold: int = 3):
+    """Fail if the block runs more than ``max_queries`` or any N+1 pattern."""
+    with profile_queries() as profile:
+        yield profile
+
+    assert (
+        profile.count <= max_queries
+    ), f"expected at most {max_queries} queries, ran {profile.count}"
+    repeated = profile.repeated_shapes(n_plus_one_threshold)
+    assert not repeated, f"repeated statement shapes (N+1): {repeated}"
+
+
+class ProfilingMiddleware:
+    """Profiles the SQL of every request and reports it in response headers.
+
+    Adds ``X-Query-Count``, ``X-Query-Time-Ms`` and ``X-N-Plus-One`` and keeps
+    the most recent reports for the debug endpoint.
+    """
+
+    def __init__(self, app: ASGIApp, threshold: int, history: Deque[dict]):
+        self.app = app
+        self.threshold = threshold
+        self.history = history
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries(f"{scope['method']} {scope['path']}") as profile:
+
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    repeated = profile.repeated_shapes(self.threshold)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-query-count", str(profile.count).encode()),
+                        (b"x-query-time-ms", f"{profile.total_ms:.2f}".encode()),
+                        (b"x-n-plus-one", str(len(repeated)).encode()),
+                    ]
+                await send(message)
+
+            started = time.time()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                report = profile.report(self.threshold)
+                report["started_at"] = started
+                self.history.append(report)
+
+
+profile_history: Deque[dict] = deque(maxlen=Config.SQL_PROFILING_HISTORY)
+
+
+def debug_queries(request: Request) -> JSONResponse:
+    return JSONResponse(list(profile_history))
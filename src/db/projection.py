@@ -0,0 +1,58 @@
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Tuple
+from sqlalchemy import select
+from src.errors import InvalidFields
+
+
+class Projection:
+    """Sparse fieldsets for a response model.
+
+    Every public field maps to the columns it is built from, so a request
+    for a few fields becomes a column-level ``SELECT`` whose rows are turned
+    into plain dicts, skipping ORM hydration and model validation. Fields
+    derived from other columns are produced by a function of the row.
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, Sequence[Any]],
+        computed: Optional[Dict[str, Callable[[Mapping], Any]]] = None,
+    ):
+        self.columns = columns
+        self.computed = computed or {}
+        self.fields = tuple(columns)
+
+    def parse(self, fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+        """Validate a comma separated ``fields`` parameter."""
+        if fields is None:
+            return None
+
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        if not requested or not requested <= self.columns.keys():
+            raise InvalidFields()
+
+        # canonical order, so equivalent requests share cache entries
+        return tuple(field for field in self.fields if field in requested)
+
+    def statement(self, fields: Sequence[str], *extra: Any):
+        """``SELECT`` of the columns behind ``fields`` plus ``extra`` ones
+        (e.g. the pagination keys)."""
+        columns = {}
+        for field in fields:
+            for column in self.columns[field]:
+                columns.setdefault(column.key, column)
+        for column in extra:
+            columns.setdefault(column.key, column)
+
+        return select(*columns.values())
+
+    def dump(self, row, fields: Sequence[str]) -> dict:
+        mapping = row._mapping
+
+        return {
+            field: (
+                self.computed[field](mapping)
+                if field in self.computed
+                else mapping[field]
+            )
+            for field in fields
+        }
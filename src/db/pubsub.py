@@ -0,0 +1,86 @@
+from typing import Awaitable, Callable, Dict, List, Optional
+from src.config import Config
+import redis.asyncio as aioredis
+import asyncio
+import logging
+
+Handler = Callable[[str], Awaitable[None]]
+ConnectCallback = Callable[[], Awaitable[None]]
+
+RECONNECT_DELAY = 1
+
+logger = logging.getLogger(__name__)
+
+# kept apart from src.db.redis so the blocking subscription never holds a
+# connection that request handlers are waiting for
+pubsub_client = aioredis.from_url(Config.REDIS_URL)
+
+
+class PubSubListener:
+    """One Redis pub/sub connection per worker, fanned out to handlers.
+
+    ``connected`` is only true while the subscription is live. Messages sent
+    while it is down are lost, so ``on_connect`` callbacks run after every
+    (re)subscribe to let consumers resynchronise local state, and
+    ``connected`` is only set once they have all finished. Messages that
+    arrive meanwhile wait on the connection. Callbacks must not block for
+    long; slow resynchronisation belongs in a task.
+    """
+
+    def __init__(self):
+        self.connected = False
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._connect_callbacks: List[ConnectCallback] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_connect(self, callback: ConnectCallback) -> None:
+        self._connect_callbacks.append(callback)
+
+    async def _dispatch(self, message: dict) -> None:
+        channel = message["channel"].decode()
+        data = message["data"].decode()
+        for handler in self._handlers.get(channel, []):
+            try:
+                await handler(data)
+            except Exception:
+                logger.exception("pub/sub handler for %s failed", channel)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = pubsub_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(*self._handlers)
+                for callback in self._connect_callbacks:
+                    await callback()
+                self.connected = True
+
+                async for message in pubsub.listen():
+                    await self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("pub/sub connection lost: %s", e)
+            finally:
+                self.connected = False
+                await pubsub.close()
+
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def start(self) -> None:
+        if self._handlers and self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+pubsub_listener = PubSubListener()
+
+
+async def publish(channel: str, message: str) -> None:
+    await pubsub_client.publish(channel, message)
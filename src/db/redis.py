@@ -1,16 +1,160 @@
 from src.config import Config
+from src.db.pubsub import pubsub_listener, publish
+from src.db.revocation import RevocationFilter
+from src.metrics import REDIS_COMMAND_DURATION, REVOCATION_CHECKS
+from typing import Dict
 import redis.asyncio as aioredis
+import asyncio
+import time
 
-JTI_EXPIRY = 3600
+REVOCATION_BUCKET_SECONDS = 3600
+REVOCATION_BUCKET_PREFIX = "blocklist:"
+REVOKED_BEFORE_PREFIX = "revoked_before:"
+REVOCATION_CHANNEL = "bookly:revocations"
+USER_REVOCATION_CHANNEL = "bookly:user_revocations"
 
-token_blocklist = aioredis.from_url(Config.REDIS_URL)
 
+class InstrumentedRedis(aioredis.Redis):
+    async def execute_command(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_DURATION.labels(command=str(args[0]).upper()).observe(
+                time.perf_counter() - start
+            )
 
-async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(name=jti, value="", ex=JTI_EXPIRY)
 
+redis_client = InstrumentedRedis.from_url(Config.REDIS_URL)
 
-async def token_in_blocklist(jti: str) -> bool:
-    jti = await token_blocklist.get(jti)
+revocation_filter = RevocationFilter(
+    capacity=Config.REVOCATION_FILTER_CAPACITY,
+    error_rate=Config.REVOCATION_FILTER_ERROR_RATE,
+)
+# user id -> tokens issued before this timestamp are revoked
+revoked_before: Dict[str, float] = {}
+_rebuild_task = None
 
-    return jti is not None
+
+def _bucket_key(exp: int) -> str:
+    return f"{REVOCATION_BUCKET_PREFIX}{int(exp) // REVOCATION_BUCKET_SECONDS}"
+
+
+async def add_jti_to_blocklist(jti: str, exp: int) -> None:
+    """Revoke one token until its own expiry.
+
+    Revocations are grouped into one hash per hour of expiry, and the hash
+    expires as soon as every token in it has, so Redis drops them in bulk.
+    """
+    bucket_key = _bucket_key(exp)
+    bucket_end = (int(exp) // REVOCATION_BUCKET_SECONDS + 1) * REVOCATION_BUCKET_SECONDS
+
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hset(bucket_key, jti, "")
+        pipe.expireat(bucket_key, bucket_end + REVOCATION_BUCKET_SECONDS)
+        await pipe.execute()
+
+    revocation_filter.add(jti)
+    await publish(REVOCATION_CHANNEL, jti)
+
+
+async def revoke_user_tokens(user_id: str, ttl: int) -> None:
+    """Revoke every token issued to a user so far, in O(1).
+
+    ``ttl`` must cover the longest token lifetime; after that no token issued
+    before the watermark can still be valid.
+    """
+    now = time.time()
+    await redis_client.set(REVOKED_BEFORE_PREFIX + user_id, now, ex=ttl)
+    revoked_before[user_id] = now
+    await publish(USER_REVOCATION_CHANNEL, f"{user_id} {now}")
+
+
+async def token_in_blocklist(token_data: dict) -> bool:
+    jti = token_data["jti"]
+    user_id = token_data["user"]["id"]
+    issued_at = token_data.get("iat", 0)
+
+    # local state can only be trusted while revocations are streaming in
+    if not (revocation_filter.ready and pubsub_listener.connected):
+        REVOCATION_CHECKS.labels(result="bypassed").inc()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(REVOKED_BEFORE_PREFIX + user_id)
+            pipe.hexists(_bucket_key(token_data["exp"]), jti)
+            watermark, revoked = await pipe.execute()
+
+        return bool(revoked) or (watermark is not None and issued_at < float(watermark))
+
+    watermark = revoked_before.get(user_id)
+    if watermark is not None and issued_at < watermark:
+        REVOCATION_CHECKS.labels(result="revoked_before").inc()
+        return True
+
+    if not revocation_filter.might_contain(jti):
+        REVOCATION_CHECKS.labels(result="filtered").inc()
+        return False
+
+    revoked = await redis_client.hexists(_bucket_key(token_data["exp"]), jti)
+
+    if revoked:
+        REVOCATION_CHECKS.labels(result="revoked").inc()
+    else:
+        REVOCATION_CHECKS.labels(result="false_positive").inc()
+        if revocation_filter.degraded:
+            _schedule_rebuild()
+
+    return bool(revoked)
+
+
+async def _scan_revoked_jtis():
+    async for bucket_key in redis_client.scan_iter(
+        match=REVOCATION_BUCKET_PREFIX + "*", count=1000
+    ):
+        async for jti, _ in redis_client.hscan_iter(bucket_key, count=1000):
+            yield jti.decode()
+
+
+async def rebuild_revocation_filter() -> None:
+    watermarks = {}
+    async for key in redis_client.scan_iter(
+        match=REVOKED_BEFORE_PREFIX + "*", count=1000
+    ):
+        watermark = await redis_client.get(key)
+        if watermark is not None:
+            watermarks[key.decode()[len(REVOKED_BEFORE_PREFIX) :]] = float(watermark)
+    revoked_before.clear()
+    revoked_before.update(watermarks)
+
+    await revocation_filter.rebuild(_scan_revoked_jtis)
+
+
+def _schedule_rebuild(restart: bool = False) -> None:
+    global _rebuild_task
+    if _rebuild_task is not None and not _rebuild_task.done():
+        if not restart:
+            return
+        _rebuild_task.cancel()
+    _rebuild_task = asyncio.create_task(rebuild_revocation_filter())
+
+
+async def _on_revocation(jti: str) -> None:
+    revocation_filter.add(jti)
+
+
+async def _on_user_revocation(message: str) -> None:
+    user_id, watermark = message.split(" ")
+    revoked_before[user_id] = max(float(watermark), revoked_before.get(user_id, 0))
+
+
+async def _on_connect() -> None:
+    # revocations published while we were disconnected are missing from the
+    # filter, so every check goes to Redis until a fresh scan has finished;
+    # a scan already running may have started before the disconnect
+    revocation_filter.ready = False
+    _schedule_rebuild(restart=True)
+
+
+if Config.REVOCATION_FILTER_ENABLED:
+    pubsub_listener.subscribe(REVOCATION_CHANNEL, _on_revocation)
+    pubsub_listener.subscribe(USER_REVOCATION_CHANNEL, _on_user_revocation)
+    pubsub_listener.on_connect(_on_connect)
@@ -0,0 +1,106 @@
+from typing import Callable, List, Optional
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+import asyncio
+import logging
+
+REPLICATION_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    """)
+
+logger = logging.getLogger(__name__)
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.session_maker = sessionmaker(
+            bind=engine, class_=AsyncSession, expire_on_commit=False
+        )
+        self.healthy = False
+        self.lag: Optional[float] = None
+
+
+class ReplicaRouter:
+    """Spreads read-only sessions across healthy, caught-up replicas.
+
+    Replicas start out unhealthy and are only used once a health check has
+    seen them answer with a replication lag below ``max_lag``.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        engine_factory: Callable[[str], AsyncEngine],
+        max_lag: float,
+        check_interval: float,
+    ):
+        self.replicas = [Replica(engine_factory(url)) for url in urls]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._next = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[Replica]:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if replica.healthy:
+                return replica
+
+        return None
+
+    def mark_unhealthy(self, replica: Replica) -> None:
+        if replica.healthy:
+            logger.warning("replica %s marked unhealthy", replica.engine.url)
+        replica.healthy = False
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            async with replica.engine.connect() as conn:
+                lag = await asyncio.wait_for(
+                    conn.scalar(REPLICATION_LAG_QUERY), timeout=self.check_interval
+                )
+        except (DBAPIError, OSError, asyncio.TimeoutError):
+            replica.lag = None
+            self.mark_unhealthy(replica)
+            return
+
+        replica.lag = float(lag)
+        replica.healthy = replica.lag <= self.max_lag
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def _run_health_checks(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check_all()
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+
+        await self.check_all()
+        self._task = asyncio.create_task(self._run_health_checks())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        for replica in self.replicas:
+            await replica.engine.dispose()
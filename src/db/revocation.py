@@ -0,0 +1,128 @@
+from typing import AsyncIterator, Callable, List, Optional
+from src.metrics import (
+    REVOCATION_FILTER_BYTES,
+    REVOCATION_FILTER_ENTRIES,
+    REVOCATION_FILTER_FALSE_POSITIVE_RATE,
+    REVOCATION_FILTER_REBUILD_SECONDS,
+)
+import hashlib
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        added = False
+        for position in self._positions(item):
+            byte, bit = position >> 3, 1 << (position & 7)
+            if not self._bits[byte] & bit:
+                self._bits[byte] |= bit
+                added = True
+        # adding an item again, e.g. our own revocation echoed back over
+        # pub/sub, sets no new bits and must not inflate the estimate
+        if added:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    @property
+    def false_positive_rate(self) -> float:
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** (
+            self.num_hashes
+        )
+
+
+class RevocationFilter:
+    """Local Bloom filter of revoked token ids.
+
+    A miss proves the token was never revoked; a hit has to be confirmed by
+    the caller against the authoritative store. Until the first rebuild has
+    finished, and again from a pub/sub reconnect until the rebuild it
+    triggers has, the filter is not ``ready`` and must not be trusted.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.ready = False
+        self.last_rebuild_seconds: Optional[float] = None
+        self._filter = BloomFilter(capacity, error_rate)
+        self._pending: Optional[List[str]] = None
+
+    def add(self, jti: str) -> None:
+        self._filter.add(jti)
+        if self._pending is not None:
+            self._pending.append(jti)
+        self._report()
+
+    def might_contain(self, jti: str) -> bool:
+        return jti in self._filter
+
+    @property
+    def degraded(self) -> bool:
+        # expired revocations are never removed, only dropped by a rebuild
+        return self._filter.false_positive_rate > self.error_rate * 10
+
+    async def rebuild(self, scan: Callable[[], AsyncIterator[str]]) -> None:
+        started = time.perf_counter()
+        # revocations arriving mid-scan go to both the old and the new filter
+        self._pending = []
+        try:
+            jtis = [jti async for jti in scan()]
+            new_filter = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+            for jti in jtis + self._pending:
+                new_filter.add(jti)
+        finally:
+            self._pending = None
+
+        self._filter = new_filter
+        self.ready = True
+        self.last_rebuild_seconds = time.perf_counter() - started
+        REVOCATION_FILTER_REBUILD_SECONDS.set(self.last_rebuild_seconds)
+        self._report()
+        logger.info(
+            "revocation filter rebuilt: %d entries, %d bytes, fp rate %.2e, %.3fs",
+            self._filter.count,
+            self._filter.memory_bytes,
+            self._filter.false_positive_rate,
+            self.last_rebuild_seconds,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "entries": self._filter.count,
+            "memory_bytes": self._filter.memory_bytes,
+            "false_positive_rate": self._filter.false_positive_rate,
+            "last_rebuild_seconds": self.last_rebuild_seconds,
+        }
+
+    def _report(self) -> None:
+        REVOCATION_FILTER_ENTRIES.set(self._filter.count)
+        REVOCATION_FILTER_BYTES.set(self._filter.memory_bytes)
+        REVOCATION_FILTER_FALSE_POSITIVE_RATE.set(self._filter.false_positive_rate)
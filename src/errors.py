@@ -76,6 +76,42 @@ class UserNotFound(BooklyException):
     pass
 
 
+class InvalidCursor(BooklyException):
+    """User has provided a malformed pagination cursor."""
+
+    pass
+
+
+class InvalidFields(BooklyException):
+    """User has requested fields the resource does not have."""
+
+    pass
+
+
+class ServiceBusy(BooklyException):
+    """The server is saturated and cannot accept more work right now."""
+
+    pass
+
+
+class ImportNotFound(BooklyException):
+    """Import to resume does not exist or has expired."""
+
+    pass
+
+
+class UnsupportedImportFormat(BooklyException):
+    """Import body is neither NDJSON nor CSV."""
+
+    pass
+
+
+class AutocompleteDisabled(BooklyException):
+    """Autocomplete is turned off on this server."""
+
+    pass
+
+
 def create_exception_handler(
     status_code: int, initial_detail: Any
 ) -> Callable[[Request, Exception], JSONResponse]:
@@ -119,6 +155,72 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        InvalidCursor,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Pagination cursor is invalid.",
+                "error_code": "invalid_cursor",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        InvalidFields,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Requested fields are invalid.",
+                "error_code": "invalid_fields",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        ServiceBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Server is busy, please retry shortly.",
+                "error_code": "service_busy",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        ImportNotFound,
+        create_exception_handler(
+            status_code=status.HTTP_404_NOT_FOUND,
+            initial_detail={
+                "message": "Import not found or expired.",
+                "error_code": "import_not_found",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        UnsupportedImportFormat,
+        create_exception_handler(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            initial_detail={
+                "message": "Import body must be application/x-ndjson or text/csv.",
+                "error_code": "unsupported_import_format",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        AutocompleteDisabled,
+        create_exception_handler(
+            status_code=status.HTTP_404_NOT_FOUND,
+            initial_detail={
+                "message": "Autocomplete is not enabled.",
+                "error_code": "autocomplete_disabled",
+            },
+        ),
+    )
+
     app.add_exception_handler(
         InvalidCredentials,
         create_exception_handler(
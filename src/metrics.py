@@ -0,0 +1,126 @@
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from starlette.requests import Request
+from starlette.responses import Response
+import os
+
+INVALID_TOKENS = Counter(
+    "bookly_invalid_tokens_total",
+    "Bearer tokens rejected before reaching a handler.",
+    ["reason"],
+)
+
+CACHE_REQUESTS = Counter(
+    "bookly_cache_requests_total",
+    "Response cache lookups by outcome (hit, stale, miss).",
+    ["cache", "result"],
+)
+
+LOCAL_CACHE_EVENTS = Counter(
+    "bookly_local_cache_events_total",
+    "In-process cache hits, misses and evictions.",
+    ["event"],
+)
+
+LOCAL_CACHE_BYTES = Gauge(
+    "bookly_local_cache_bytes",
+    "Estimated memory held by the in-process cache.",
+    multiprocess_mode="liveall",
+)
+
+REVOCATION_CHECKS = Counter(
+    "bookly_revocation_checks_total",
+    "Token revocation checks by outcome of the local filter.",
+    ["result"],
+)
+
+REVOCATION_FILTER_ENTRIES = Gauge(
+    "bookly_revocation_filter_entries",
+    "Revoked token ids held in the local filter.",
+    multiprocess_mode="liveall",
+)
+
+REVOCATION_FILTER_BYTES = Gauge(
+    "bookly_revocation_filter_bytes",
+    "Memory used by the local revocation filter's bit array.",
+    multiprocess_mode="liveall",
+)
+
+REVOCATION_FILTER_FALSE_POSITIVE_RATE = Gauge(
+    "bookly_revocation_filter_false_positive_rate",
+    "Estimated false positive rate of the local revocation filter.",
+    multiprocess_mode="liveall",
+)
+
+REVOCATION_FILTER_REBUILD_SECONDS = Gauge(
+    "bookly_revocation_filter_rebuild_seconds",
+    "Duration of the last revocation filter rebuild.",
+    multiprocess_mode="liveall",
+)
+
+REQUEST_DURATION = Histogram(
+    "bookly_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route"],
+)
+
+REQUESTS_IN_PROGRESS = Gauge(
+    "bookly_http_requests_in_progress",
+    "HTTP requests currently being handled.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+RESPONSES = Counter(
+    "bookly_http_responses_total",
+    "HTTP responses by route template and status code.",
+    ["method", "route", "status"],
+)
+
+DB_QUERY_DURATION = Histogram(
+    "bookly_db_query_duration_seconds",
+    "SQL statement execution time.",
+    ["operation"],
+)
+
+DB_POOL_CHECKOUT_DURATION = Histogram(
+    "bookly_db_pool_checkout_duration_seconds",
+    "Time spent waiting for a connection from the pool.",
+)
+
+REDIS_COMMAND_DURATION = Histogram(
+    "bookly_redis_command_duration_seconds",
+    "Redis command round trip time.",
+    ["command"],
+)
+
+PASSWORD_HASH_DURATION = Histogram(
+    "bookly_password_hash_duration_seconds",
+    "bcrypt hashing and verification time, including pool queueing.",
+    ["operation"],
+)
+
+CELERY_ENQUEUE_DURATION = Histogram(
+    "bookly_celery_enqueue_duration_seconds",
+    "Time to hand a task to the Celery broker.",
+    ["task"],
+)
+
+
+def metrics_endpoint(request: Request) -> Response:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # aggregate what every worker process has written to the shared dir
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
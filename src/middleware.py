@@ -1,27 +1,184 @@
 from fastapi import FastAPI
-from fastapi import FastAPI, status
-from fastapi.requests import Request
-from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-import time
+from logging.handlers import QueueHandler
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.config import Config
+from src.metrics import REQUEST_DURATION, REQUESTS_IN_PROGRESS, RESPONSES
+from src.db.main import ReadYourWritesMiddleware
+from src.db.profiling import ProfilingMiddleware, profile_history
+import json
 import logging
+import queue
+import random
+import sys
+import threading
+import time
+
+access_logger = logging.getLogger("bookly.access")
+access_logger.propagate = False
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the writer thread untouched, dropping them when full.
+
+    Formatting is left to the writer so request handling never pays for it.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchedLogWriter(threading.Thread):
+    """Drains access log records and writes them in batches, one JSON per line."""
+
+    def __init__(self, log_queue: queue.Queue, stream, batch_size: int):
+        super().__init__(name="access-log-writer", daemon=True)
+        self.queue = log_queue
+        self.stream = stream
+        self.batch_size = batch_size
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not (self._stopped.is_set() and self.queue.empty()):
+            try:
+                batch = [self.queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = [
+                json.dumps(record.access, separators=(",", ":")) for record in batch
+            ]
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join(timeout=5)
+
 
+class AccessLogMiddleware:
+    """Pure ASGI access logging, without BaseHTTPMiddleware's per-request task."""
 
-logger = logging.getLogger("uvicorn.access")
-logging.disable = True
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (
+            self.sample_rate < 1 and random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter_ns()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            client = scope.get("client")
+            access_logger.info(
+                "access",
+                extra={
+                    "access": {
+                        "ts": time.time(),
+                        "client": f"{client[0]}:{client[1]}" if client else None,
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": (time.perf_counter_ns() - start) / 1_000_000,
+                    }
+                },
+            )
+
+
+class MetricsMiddleware:
+    """Records latency and status per route template, e.g. /books/{book_id}."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = REQUESTS_IN_PROGRESS.labels(method=method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            # the matched route is only known once routing has run; raw paths
+            # would give every book id its own time series
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            REQUEST_DURATION.labels(method=method, route=route).observe(
+                time.perf_counter() - start
+            )
+            RESPONSES.labels(method=method, route=route, status=status_code).inc()
+
+
+access_log_queue = queue.Queue(maxsize=Config.ACCESS_LOG_QUEUE_SIZE)
+access_log_writer = BatchedLogWriter(
+    access_log_queue, sys.stdout, batch_size=Config.ACCESS_LOG_BATCH_SIZE
+)
 
 
 def register_middleware(app: FastAPI):
-    @app.middleware("http")
-    async def custom_logging(request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        processing_time = time.time() - start_time
-        message = f"{request.client.host}:{request.client.port} - {request.method} - {request.url.path} - {response.status_code} - completed after {processing_time}s"
-        print(message)
-
-        return response
+    if Config.SQL_PROFILING:
+        app.add_middleware(
+            ProfilingMiddleware,
+            threshold=Config.SQL_PROFILING_N_PLUS_ONE_THRESHOLD,
+            history=profile_history,
+        )
+
+    if Config.ACCESS_LOG_ENABLED:
+        access_logger.setLevel(logging.INFO)
+        access_logger.addHandler(DroppingQueueHandler(access_log_queue))
+        app.add_middleware(
+            AccessLogMiddleware, sample_rate=Config.ACCESS_LOG_SAMPLE_RATE
+        )
+
+    app.add_middleware(MetricsMiddleware)
+
+    if Config.DATABASE_REPLICA_URLS:
+        app.add_middleware(
+            ReadYourWritesMiddleware, seconds=Config.READ_YOUR_WRITES_SECONDS
+        )
 
     app.add_middleware(
         CORSMiddleware,
@@ -0,0 +1,38 @@
+from functools import lru_cache
+from typing import Any
+from fastapi import status
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def type_adapter(schema: Any) -> TypeAdapter:
+    """One ``TypeAdapter`` per response type; building its validator and
+    serializer is far more expensive than using them."""
+    return TypeAdapter(schema)
+
+
+def json_response(
+    schema: Any,
+    content: Any,
+    trusted: bool = False,
+    status_code: int = status.HTTP_200_OK,
+) -> Response:
+    """Encode ``content`` as ``schema`` straight to JSON bytes.
+
+    A route returning a ``Response`` skips FastAPI's own ``response_model``
+    pass, which would validate the content into a dict and encode that
+    again. Unless ``trusted`` (already instances of ``schema``), the content
+    is validated once here, reading ORM objects by attribute. ``trusted``
+    only saves validating again models the caller has just built; lists
+    are cheaper still as plain dicts from selected columns.
+    """
+    adapter = type_adapter(schema)
+    if not trusted:
+        content = adapter.validate_python(content, from_attributes=True)
+
+    return Response(
+        content=adapter.dump_json(content),
+        status_code=status_code,
+        media_type="application/json",
+    )
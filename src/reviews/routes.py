@@ -1,13 +1,45 @@
-from fastapi import APIRouter, Depends
-from src.db.models import User
-from src.db.main import get_session
-from src.auth.dependencies import get_current_user
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from src.db.main import get_session, get_read_session
+from src.db.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.auth.dependencies import get_current_principal
+from src.auth.schemas import Principal
+from src.books.service import BookService
+from src.errors import BookNotFound
+from src.responses import json_response
 from sqlmodel.ext.asyncio.session import AsyncSession
-from .schemas import ReviewCreateModel
+from .schemas import ReviewCreateModel, ReviewPageModel, ReviewSort
 from .service import ReviewService
 
 review_router = APIRouter()
 review_service = ReviewService()
+book_service = BookService()
+
+
+@review_router.get(
+    "/book/{book_id}",
+    response_model=ReviewPageModel,
+    dependencies=[Depends(get_current_principal)],
+)
+async def get_book_reviews(
+    book_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: ReviewSort = "newest",
+    rating: Optional[int] = Query(None, ge=0, lt=5),
+    session: AsyncSession = Depends(get_read_session),
+):
+    reviews, next_cursor = await review_service.get_book_reviews(
+        session, book_id, limit, cursor, sort, rating
+    )
+
+    if not reviews and cursor is None:
+        if await book_service.get_book_by_id(session, book_id) is None:
+            raise BookNotFound()
+
+    return json_response(
+        ReviewPageModel, {"items": reviews, "next_cursor": next_cursor}
+    )
 
 
 @review_router.post("/book/{book_id}")
@@ -15,11 +47,11 @@ async def add_review_to_books(
     book_id: str,
     review_data: ReviewCreateModel,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    principal: Principal = Depends(get_current_principal),
 ):
     new_review = await review_service.add_review_to_book(
         session=session,
-        user_email=current_user.email,
+        user_id=principal.id,
         book_id=book_id,
         review_data=review_data,
     )
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Literal, Optional
 
 
 class ReviewModel(BaseModel):
@@ -13,6 +13,14 @@ class ReviewModel(BaseModel):
     updated_at: datetime
 
 
+class ReviewPageModel(BaseModel):
+    items: List[ReviewModel]
+    next_cursor: Optional[str] = None
+
+
+ReviewSort = Literal["newest", "rating"]
+
+
 class ReviewCreateModel(BaseModel):
-    rating: int = Field(lt=5)
+    rating: int = Field(ge=0, lt=5)
     review_text: str
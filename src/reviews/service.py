@@ -1,27 +1,114 @@
-from src.db.models import Review
+from src.db.models import Book, Review, RATING_LEVELS
+from src.db.pagination import encode_cursor, paginate
 from src.auth.service import UserService
 from src.books.service import BookService
+from src.books.cache import invalidate_book_detail
+from src.books.autocomplete import current_xact_id, publish_book_changes
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel import select
+from sqlalchemy import cast, desc, func, literal, or_, true, update
+from sqlalchemy.orm import aliased
+import sqlalchemy.dialects.postgresql as pg
 from fastapi.exceptions import HTTPException
 from fastapi import status
-from .schemas import ReviewCreateModel
+from typing import Dict, List, Optional
+from .schemas import ReviewCreateModel, ReviewSort
 import logging
 
+logger = logging.getLogger(__name__)
+
 user_service = UserService()
 book_service = BookService()
 
+book_table = Book.__table__
+
+REVIEW_ORDERINGS = {
+    "newest": (Review.created_at, Review.id),
+    "rating": (Review.rating, Review.created_at, Review.id),
+}
+
+
+def review_aggregates():
+    """Per-book review count, rating sum and rating histogram."""
+    return select(
+        Review.book_id,
+        func.count(Review.id).label("review_count"),
+        func.coalesce(func.sum(Review.rating), 0).label("rating_sum"),
+        cast(
+            pg.array(
+                [
+                    func.count(Review.id).filter(Review.rating == rating)
+                    for rating in range(RATING_LEVELS)
+                ]
+            ),
+            pg.ARRAY(pg.INTEGER),
+        ).label("rating_histogram"),
+    ).group_by(Review.book_id)
+
 
 class ReviewService:
+    async def get_book_reviews(
+        self,
+        session: AsyncSession,
+        book_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: ReviewSort = "newest",
+        rating: Optional[int] = None,
+    ):
+        statement = select(Review).where(Review.book_id == book_id)
+        if rating is not None:
+            statement = statement.where(Review.rating == rating)
+
+        return await paginate(session, statement, REVIEW_ORDERINGS[sort], limit, cursor)
+
+    async def get_latest_reviews(
+        self, session: AsyncSession, book_ids: List[str], limit: int
+    ) -> Dict[str, tuple]:
+        """Newest ``limit`` reviews of each book plus the cursor that
+        continues its listing, in one index range scan per book."""
+        ordering = REVIEW_ORDERINGS["newest"]
+        requested = (
+            func.unnest(literal(book_ids, pg.ARRAY(pg.VARCHAR)))
+            .table_valued("id")
+            .render_derived(name="requested")
+        )
+        latest = (
+            select(Review)
+            .where(Review.book_id == requested.c.id)
+            .order_by(*[desc(c) for c in ordering])
+            .limit(limit + 1)
+            .lateral("latest")
+        )
+        statement = select(aliased(Review, latest)).select_from(requested)
+        result = await session.exec(statement.join(latest, true()))
+
+        reviews: Dict[str, List[Review]] = {book_id: [] for book_id in book_ids}
+        for review in result.all():
+            reviews[review.book_id].append(review)
+
+        pages = {}
+        for book_id, rows in reviews.items():
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(
+                    [getattr(rows[-1], c.key) for c in ordering]
+                )
+            pages[book_id] = (rows, next_cursor)
+
+        return pages
+
     async def add_review_to_book(
         self,
         session: AsyncSession,
-        user_email: str,
+        user_id: str,
         book_id: int,
         review_data: ReviewCreateModel,
     ):
         try:
             book = await book_service.get_book_by_id(session, book_id)
-            user = await user_service.get_user_by_email(session, user_email)
+            user = await user_service.get_user_by_id(session, user_id)
             review_data_dict = review_data.model_dump()
             new_review = Review(**review_data_dict)
 
@@ -40,12 +127,86 @@ class ReviewService:
             new_review.user = user
             new_review.book = book
             session.add(new_review)
+            # incremented in SQL so concurrent reviews cannot lose updates
+            rating = new_review.rating
+            await session.execute(
+                update(book_table)
+                .where(book_table.c.id == book_id)
+                .values(
+                    {
+                        book_table.c.review_count: book_table.c.review_count + 1,
+                        book_table.c.rating_sum: book_table.c.rating_sum + rating,
+                        book_table.c.rating_histogram[rating]: (
+                            book_table.c.rating_histogram[rating] + 1
+                        ),
+                        # aggregates are not an edit of the book itself
+                        book_table.c.updated_at: book_table.c.updated_at,
+                    }
+                )
+            )
+            xid = await current_xact_id(session)
             await session.commit()
-
-            return new_review
         except Exception as e:
             logging.exception(e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Oops, something went wrong!",
             )
+
+        # the review is committed; a failed invalidation only leaves the cached
+        # book stale until its TTL and must not turn the request into a 500
+        try:
+            await invalidate_book_detail(book_id)
+            await publish_book_changes((book.title, book.author, 1), xid=xid)
+        except Exception:
+            logger.exception("post-commit updates for book %s failed", book_id)
+
+        return new_review
+
+    async def reconcile_aggregates(self, session: AsyncSession) -> List[str]:
+        """Recompute the review aggregates of books that drifted from the
+        review table and return their ids."""
+        aggregates = review_aggregates().subquery()
+        empty_histogram = pg.array([0] * RATING_LEVELS)
+        statement = (
+            select(Book.id)
+            .outerjoin(aggregates, aggregates.c.book_id == Book.id)
+            .where(
+                or_(
+                    Book.review_count != func.coalesce(aggregates.c.review_count, 0),
+                    Book.rating_sum != func.coalesce(aggregates.c.rating_sum, 0),
+                    Book.rating_histogram
+                    != func.coalesce(aggregates.c.rating_histogram, empty_histogram),
+                )
+            )
+        )
+        drifted = (await session.exec(statement)).all()
+        await session.commit()
+
+        for book_id in drifted:
+            # the row lock orders this against concurrent add_review_to_book
+            await session.exec(
+                select(Book.id).where(Book.id == book_id).with_for_update()
+            )
+            result = await session.exec(
+                review_aggregates().where(Review.book_id == book_id)
+            )
+            row = result.first()
+            await session.execute(
+                update(book_table)
+                .where(book_table.c.id == book_id)
+                .values(
+                    review_count=row.review_count if row else 0,
+                    rating_sum=row.rating_sum if row else 0,
+                    rating_histogram=(
+                        row.rating_histogram if row else [0] * RATING_LEVELS
+                    ),
+                    updated_at=book_table.c.updated_at,
+                )
+            )
+            await session.commit()
+
+        if drifted:
+            logging.warning("reconciled review aggregates of %d books", len(drifted))
+
+        return drifted
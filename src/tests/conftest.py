@@ -0,0 +1,145 @@
+from datetime import date
+from sqlalchemy.exc import SQLAlchemyError
+import fakeredis
+import httpx
+import pytest
+from src import app
+from src.auth.utils import create_access_token, get_user_claims
+from src.db.local_cache import local_cache
+from src.db.main import async_engine, async_session_maker, init_db, replica_router
+from src.db.models import Book, Review, User
+from src.db.profiling import query_budget as _query_budget
+from src.db.pubsub import pubsub_client
+from src.db.redis import redis_client
+from src.db.replicas import ReplicaRouter
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def redis_server(monkeypatch):
+    """Every test gets its own empty in-memory Redis."""
+    server = fakeredis.FakeServer()
+    for client in (redis_client, pubsub_client):
+        fake = fakeredis.aioredis.FakeRedis(server=server)
+        monkeypatch.setattr(client, "connection_pool", fake.connection_pool)
+    local_cache.clear()
+
+    yield server
+
+    local_cache.clear()
+
+
+class LaggingReplica:
+    def session_maker(self):
+        raise AssertionError("read from a replica that may be lagging")
+
+
+@pytest.fixture
+def lagging_replica(monkeypatch):
+    """Replicas are enabled, but any session opened on one fails the test."""
+    monkeypatch.setattr(ReplicaRouter, "enabled", property(lambda self: True))
+    monkeypatch.setattr(replica_router, "pick", lambda: LaggingReplica())
+
+
+@pytest.fixture
+async def database(anyio_backend):
+    """An empty schema in the PostgreSQL database at ``TEST_DATABASE_URL``."""
+    try:
+        async with async_engine.begin() as conn:
+            await conn.exec_driver_sql("DROP SCHEMA public CASCADE")
+            await conn.exec_driver_sql("CREATE SCHEMA public")
+        await init_db()
+    except (OSError, SQLAlchemyError) as e:
+        pytest.skip(f"test database is not available: {e}")
+
+    yield
+
+    await async_engine.dispose()
+
+
+@pytest.fixture
+async def session(database):
+    async with async_session_maker() as session:
+        yield session
+
+
+@pytest.fixture
+async def client(database):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+async def admin(session):
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        first_name="Ada",
+        last_name="Admin",
+        role="admin",
+        is_verified=True,
+        password_hash="",
+    )
+    session.add(user)
+    await session.commit()
+
+    return user
+
+
+@pytest.fixture
+def admin_headers(admin):
+    return {"Authorization": f"Bearer {create_access_token(get_user_claims(admin))}"}
+
+
+@pytest.fixture
+def add_books(session, admin):
+    async def add_books(count: int, user: User = admin):
+        books = [
+            Book(
+                title=f"Book {i}",
+                author=f"Author {i % 3}",
+                publisher="Bookly Press",
+                published_date=date(2000 + i % 20, 1, 1),
+                page_count=100 + i,
+                language="en",
+                user_id=user.id,
+            )
+            for i in range(count)
+        ]
+        session.add_all(books)
+        await session.commit()
+
+        return books
+
+    return add_books
+
+
+@pytest.fixture
+def add_reviews(session, admin):
+    async def add_reviews(book: Book, count: int, user: User = admin):
+        reviews = [
+            Review(
+                rating=i % 5,
+                review_text=f"Review {i}",
+                user_id=user.id,
+                book_id=book.id,
+            )
+            for i in range(count)
+        ]
+        session.add_all(reviews)
+        await session.commit()
+
+        return reviews
+
+    return add_reviews
+
+
+@pytest.fixture
+def query_budget():
+    """Usage: ``with query_budget(2): await client.get("/api/v1/books/")``"""
+    return _query_budget
@@ -0,0 +1,82 @@
+from datetime import date
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.books import autocomplete as autocomplete_module
+from src.books.autocomplete import Autocomplete, _on_book_changes
+from src.books.schemas import BookCreateModel
+from src.books.service import BookService
+from src.db.main import async_session_maker
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+book_service = BookService()
+
+
+async def test_rebuild_counts_each_change_once(database, admin, monkeypatch):
+    autocomplete = Autocomplete(enabled=True)
+    monkeypatch.setattr(autocomplete_module, "autocomplete", autocomplete)
+    published = []
+
+    async def publish(channel: str, message: str) -> None:
+        published.append(message)
+
+    monkeypatch.setattr(autocomplete_module, "publish", publish)
+
+    async def create(title: str) -> str:
+        book = BookCreateModel(
+            title=title,
+            author="Anon",
+            publisher="Bookly Press",
+            published_date=date(2000, 1, 1),
+            page_count=100,
+            language="en",
+        )
+        async with async_session_maker() as session:
+            await book_service.create(session, book, admin.id)
+
+        return published.pop()
+
+    # committed before the rebuild's snapshot, delivered while it scans and
+    # after it has finished
+    during = await create("Emma")
+    after = await create("Ulysses")
+
+    stream = AsyncSession.stream
+
+    async def racing_stream(self, *args, **kwargs):
+        monkeypatch.setattr(AsyncSession, "stream", stream)
+        await _on_book_changes(during)
+        # committed after the snapshot, so only the replay can add it
+        await _on_book_changes(await create("Beloved"))
+
+        return await stream(self, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncSession, "stream", racing_stream)
+    await autocomplete.rebuild()
+    await _on_book_changes(after)
+    await _on_book_changes(await create("Walden"))
+
+    index = autocomplete.index
+    weights = {title: index._weights[entry] for title, entry in index._ids[0].items()}
+    assert weights == {"Emma": 1, "Ulysses": 1, "Beloved": 1, "Walden": 1}
+    assert index._weights[index._ids[1]["Anon"]] == 4
+
+
+async def test_rebuild_reads_the_primary(database, add_books, lagging_replica):
+    await add_books(1)
+    autocomplete = Autocomplete(enabled=True)
+
+    await autocomplete.rebuild()
+
+    assert autocomplete.search("book", 10) == [("Book 0", "title")]
+
+
+async def test_disabled_autocomplete_is_not_found(client, admin_headers, monkeypatch):
+    monkeypatch.setattr(autocomplete_module.autocomplete, "enabled", False)
+
+    response = await client.get(
+        "/api/v1/books/autocomplete?q=dune", headers=admin_headers
+    )
+
+    assert response.status_code == 404
+    assert response.json()["error_code"] == "autocomplete_disabled"
@@ -0,0 +1,18 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cache_misses_are_filled_from_the_primary(
+    client, admin, admin_headers, add_books, lagging_replica
+):
+    (book,) = await add_books(1)
+
+    for url in (
+        "/api/v1/books/",
+        f"/api/v1/books/{book.id}",
+        f"/api/v1/books/{book.id}?reviews_limit=5",
+        f"/api/v1/books/user/{admin.id}",
+    ):
+        response = await client.get(url, headers=admin_headers)
+        assert response.status_code == 200, response.text
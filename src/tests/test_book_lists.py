@@ -0,0 +1,33 @@
+from sqlmodel import select
+from src.books.facets import refresh_facets
+from src.books.schemas import BookModel
+from src.db.models import Book
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_lists_match_book_model(client, session, admin, admin_headers, add_books):
+    books = await add_books(3)
+    books[0].review_count, books[0].rating_sum = 3, 8
+    session.add(books[0])
+    await session.commit()
+    await refresh_facets(session)
+
+    result = await session.exec(select(Book))
+    expected = {
+        book.id: BookModel.model_validate(book, from_attributes=True).model_dump(
+            mode="json"
+        )
+        for book in result.all()
+    }
+
+    for url in (
+        "/api/v1/books/",
+        f"/api/v1/books/user/{admin.id}",
+        "/api/v1/books/browse",
+    ):
+        response = await client.get(url, headers=admin_headers)
+        assert response.status_code == 200, response.text
+        items = response.json()["items"]
+        assert {item["id"]: item for item in items} == expected
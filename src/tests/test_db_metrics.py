@@ -0,0 +1,31 @@
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from src.db.profiling import profile_queries
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+def observed_selects() -> float:
+    count = REGISTRY.get_sample_value(
+        "bookly_db_query_duration_seconds_count", {"operation": "SELECT"}
+    )
+
+    return count or 0
+
+
+async def test_failed_statements_are_recorded(session):
+    before = observed_selects()
+
+    with profile_queries() as profile:
+        with pytest.raises(DBAPIError):
+            await session.execute(text("SELECT 1 / 0"))
+        await session.rollback()
+        await session.execute(text("SELECT 1"))
+
+    failed, succeeded = profile.queries
+    assert failed["statement"] == "SELECT 1 / 0"
+    assert failed["error"] == "DivisionByZeroError"
+    assert succeeded["error"] is None
+    assert observed_selects() == before + 2
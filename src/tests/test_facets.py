@@ -0,0 +1,84 @@
+from collections import Counter
+from datetime import date
+from src.books.facets import get_facet_counts, refresh_facets
+from src.db.models import Book
+import itertools
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def books(session, admin):
+    books = [
+        Book(
+            title=f"Book {i}",
+            author=f"Author {i % 5}",
+            publisher=f"Publisher {i % 3}",
+            published_date=date(1975 + i % 30, 1, 1),
+            page_count=100,
+            language=("en", "fr")[i % 2],
+            user_id=admin.id,
+        )
+        for i in range(60)
+    ]
+    session.add_all(books)
+    await session.commit()
+    await refresh_facets(session)
+
+    return books
+
+
+def expected_counts(books, filters: dict) -> dict:
+    values = {
+        "language": lambda b: b.language,
+        "publisher": lambda b: b.publisher,
+        "author": lambda b: b.author,
+        "decade": lambda b: b.published_date.year // 10 * 10,
+    }
+    counts = {}
+    for facet, value in values.items():
+        matching = [
+            b
+            for b in books
+            if all(
+                values[name](b) == wanted
+                for name, wanted in filters.items()
+                if name != facet and wanted is not None
+            )
+        ]
+        counted = Counter(value(b) for b in matching)
+        counts[facet] = sorted(counted.items(), key=lambda vc: (-vc[1], vc[0]))
+
+    return counts
+
+
+async def test_counts_match_the_books_under_every_filter(session, books):
+    for language, publisher, author, decade in itertools.product(
+        (None, "fr"), (None, "Publisher 1"), (None, "Author 2"), (None, 1990)
+    ):
+        filters = {
+            "language": language,
+            "publisher": publisher,
+            "author": author,
+            "decade": decade,
+        }
+        facets = await get_facet_counts(session, **filters)
+
+        expected = expected_counts(books, filters)
+        for facet, counts in expected.items():
+            got = [(c.value, c.count) for c in getattr(facets, facet)]
+            assert got == counts, (filters, facet)
+
+
+async def test_refresh_replaces_cached_counts(session, books, add_books):
+    before = await get_facet_counts(session)
+    assert before.refreshed_at is not None
+
+    await add_books(1)
+    assert await get_facet_counts(session) == before
+
+    await refresh_facets(session)
+    after = await get_facet_counts(session)
+    assert after.refreshed_at > before.refreshed_at
+    assert sum(c.count for c in after.language) == len(books) + 1
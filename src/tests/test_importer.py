@@ -0,0 +1,30 @@
+from src.books.importer import parse_csv
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def parse(text: str, **kwargs) -> list:
+    async def chunks():
+        yield text.encode()
+
+    return [parsed async for parsed in parse_csv(chunks(), **kwargs)]
+
+
+async def test_quoted_fields_span_lines():
+    rows = await parse('title,author\n"Two\nlines",Ann\nPlain,Bob\n')
+
+    assert rows == [
+        (1, {"title": "Two\nlines", "author": "Ann"}, None),
+        (2, {"title": "Plain", "author": "Bob"}, None),
+    ]
+
+
+async def test_stray_quote_rejects_one_record():
+    lines = ["title,author", 'Bad "quote,Ann'] + [f"Book {i},Bob" for i in range(50)]
+    rows = await parse("\n".join(lines), max_record_size=100)
+
+    (rejected,) = [row for row in rows if row[2] is not None]
+    assert rejected[2] == "quoted field exceeds 100 characters"
+    # the rows after the bounded record parse again
+    assert rows[-1][1] == {"title": "Book 49", "author": "Bob"}
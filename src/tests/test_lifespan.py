@@ -0,0 +1,36 @@
+from src import app
+from src.auth.hashing import password_hasher
+from src.db.pubsub import pubsub_listener
+from src.db.main import replica_router
+from src.middleware import access_log_writer
+import src
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_lifespan_starts_and_stops_background_services(monkeypatch):
+    calls = []
+
+    def record(name, is_async=True):
+        async def async_call(*args):
+            calls.append(name)
+
+        def call(*args):
+            calls.append(name)
+
+        return async_call if is_async else call
+
+    monkeypatch.setattr(src, "init_db", record("init_db"))
+    monkeypatch.setattr(replica_router, "start", record("replicas.start"))
+    monkeypatch.setattr(replica_router, "stop", record("replicas.stop"))
+    monkeypatch.setattr(pubsub_listener, "start", record("pubsub.start"))
+    monkeypatch.setattr(pubsub_listener, "stop", record("pubsub.stop"))
+    monkeypatch.setattr(access_log_writer, "start", record("log.start", False))
+    monkeypatch.setattr(access_log_writer, "stop", record("log.stop", False))
+    monkeypatch.setattr(password_hasher, "shutdown", record("hasher.shutdown", False))
+
+    async with app.router.lifespan_context(app):
+        assert calls == ["init_db", "replicas.start", "pubsub.start", "log.start"]
+
+    assert calls[4:] == ["hasher.shutdown", "replicas.stop", "pubsub.stop", "log.stop"]
@@ -0,0 +1,55 @@
+from src.db.cache import ResponseCache
+from src.db.pubsub import PubSubListener, pubsub_listener
+from src.db.redis import redis_client
+import asyncio
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_generation_read_racing_an_invalidation_is_not_cached(monkeypatch):
+    monkeypatch.setattr(pubsub_listener, "connected", True)
+    cache = ResponseCache("test", ttl=60, stale_ttl=0, lock_timeout=1)
+    await cache.bump_generation("books")
+
+    read = redis_client.get
+    raced = False
+
+    async def get_then_invalidate(key):
+        nonlocal raced
+        value = await read(key)
+        if not raced:
+            # another worker bumps the generation after our read
+            raced = True
+            await cache.bump_generation("books")
+        return value
+
+    monkeypatch.setattr(redis_client, "get", get_then_invalidate)
+
+    assert await cache.get_generation("books") == 1
+    assert await cache.get_generation("books") == 2
+
+
+async def test_listener_is_connected_only_after_callbacks():
+    listener = PubSubListener()
+    seen = []
+
+    async def handler(message: str) -> None:
+        pass
+
+    async def on_connect() -> None:
+        await asyncio.sleep(0.05)
+        seen.append(listener.connected)
+
+    listener.subscribe("test", handler)
+    listener.on_connect(on_connect)
+    await listener.start()
+    try:
+        for _ in range(100):
+            if listener.connected:
+                break
+            await asyncio.sleep(0.01)
+        assert listener.connected
+        assert seen == [False]
+    finally:
+        await listener.stop()
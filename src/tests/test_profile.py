@@ -0,0 +1,17 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("query", ["", "?fields=id,username,books"])
+async def test_profile_of_a_deleted_user_is_not_found(
+    client, session, admin, admin_headers, query
+):
+    # the token outlives the account it was issued for
+    await session.delete(admin)
+    await session.commit()
+
+    response = await client.get(f"/api/v1/auth/me{query}", headers=admin_headers)
+
+    assert response.status_code == 404
+    assert response.json()["error_code"] == "user_not_found"
@@ -0,0 +1,130 @@
+from src.db.local_cache import local_cache
+from src.db.profiling import profile_queries
+from src.db.redis import redis_client
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def count_queries(client, url: str, headers: dict) -> int:
+    # every measurement has to reach the database
+    await redis_client.flushall()
+    local_cache.clear()
+
+    with profile_queries() as profile:
+        response = await client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+
+    return profile.count
+
+
+async def test_book_list_queries_do_not_grow_with_books(
+    client, admin, admin_headers, add_books
+):
+    await add_books(1)
+    one = await count_queries(client, "/api/v1/books/?limit=50", admin_headers)
+
+    await add_books(19)
+    twenty = await count_queries(client, "/api/v1/books/?limit=50", admin_headers)
+
+    assert one == twenty
+
+
+async def test_user_books_queries_do_not_grow_with_books(
+    client, admin, admin_headers, add_books
+):
+    url = f"/api/v1/books/user/{admin.id}?limit=50"
+
+    await add_books(1)
+    one = await count_queries(client, url, admin_headers)
+
+    await add_books(19)
+    twenty = await count_queries(client, url, admin_headers)
+
+    assert one == twenty
+
+
+async def test_book_detail_queries_do_not_grow_with_reviews(
+    client, admin_headers, add_books, add_reviews
+):
+    (book,) = await add_books(1)
+    url = f"/api/v1/books/{book.id}"
+
+    await add_reviews(book, 1)
+    one = await count_queries(client, url, admin_headers)
+
+    await add_reviews(book, 19)
+    twenty = await count_queries(client, url, admin_headers)
+
+    assert one == twenty
+
+
+async def test_profile_queries_do_not_grow_with_books(
+    client, admin_headers, add_books, add_reviews
+):
+    (book,) = await add_books(1)
+    await add_reviews(book, 1)
+    one = await count_queries(client, "/api/v1/auth/me", admin_headers)
+
+    more = await add_books(19)
+    for book in more:
+        await add_reviews(book, 1)
+    twenty = await count_queries(client, "/api/v1/auth/me", admin_headers)
+
+    assert one == twenty
+
+
+async def get_within_budget(client, query_budget, max_queries, url, headers):
+    await redis_client.flushall()
+    local_cache.clear()
+
+    with query_budget(max_queries):
+        response = await client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+
+    return response
+
+
+async def test_book_list_budget(client, admin_headers, add_books, query_budget):
+    await add_books(20)
+    response = await get_within_budget(
+        client, query_budget, 1, "/api/v1/books/?limit=50", admin_headers
+    )
+    assert len(response.json()["items"]) == 20
+
+
+async def test_book_detail_budget(
+    client, admin_headers, add_books, add_reviews, query_budget
+):
+    (book,) = await add_books(1)
+    await add_reviews(book, 20)
+    await get_within_budget(
+        client, query_budget, 2, f"/api/v1/books/{book.id}", admin_headers
+    )
+
+
+async def test_user_books_budget(client, admin, admin_headers, add_books, query_budget):
+    await add_books(20)
+    response = await get_within_budget(
+        client,
+        query_budget,
+        1,
+        f"/api/v1/books/user/{admin.id}?limit=50",
+        admin_headers,
+    )
+    assert len(response.json()["items"]) == 20
+
+
+async def test_book_reviews_budget(
+    client, admin_headers, add_books, add_reviews, query_budget
+):
+    (book,) = await add_books(1)
+    await add_reviews(book, 20)
+    response = await get_within_budget(
+        client,
+        query_budget,
+        1,
+        f"/api/v1/reviews/book/{book.id}?limit=50",
+        admin_headers,
+    )
+    assert len(response.json()["items"]) == 20
@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from src.auth.service import UserService
+from src.books.facets import get_facet_counts, refresh_facets
+from src.books.service import BookService
+from src.db.main import async_engine
+from src.reviews.service import ReviewService
+import pytest
+import re
+
+pytestmark = pytest.mark.anyio
+
+USERS = 1_000
+BOOKS = 20_000
+REVIEWS = 50_000
+
+SEQ_SCAN = re.compile(r'Seq Scan on "?(user|book|review|book_facet_counts)"?\b')
+
+SEED = [
+    f"""
+    INSERT INTO "user" (id, username, email, first_name, last_name, role,
+                        is_verified, password_hash, created_at, updated_at)
+    SELECT 'u' || i, 'user' || i, 'user' || i || '@example.com', 'First', 'Last',
+           'user', true, '', now(), now()
+    FROM generate_series(1, {USERS}) AS i
+    """,
+    f"""
+    INSERT INTO book (id, title, author, publisher, published_date, page_count,
+                      language, user_id, created_at, updated_at)
+    SELECT 'b' || i, 'Book ' || i, 'Author ' || i % 500, 'Publisher ' || i % 200,
+           date '2000-01-01' + i % 7000, 100 + i % 400,
+           (array['en', 'fr', 'de', 'es'])[i % 4 + 1], 'u' || i % {USERS} + 1,
+           now() - i * interval '1 minute', now()
+    FROM generate_series(1, {BOOKS}) AS i
+    """,
+    f"""
+    INSERT INTO review (id, rating, review_text, user_id, book_id, created_at,
+                        updated_at)
+    SELECT 'r' || i, i % 5, 'Review ' || i, 'u' || i % {USERS} + 1,
+           'b' || i % {BOOKS} + 1, now() - i * interval '1 second', now()
+    FROM generate_series(1, {REVIEWS}) AS i
+    """,
+]
+
+
+@contextmanager
+def captured_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, many):
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def test_service_queries_use_indexes(session):
+    for statement in SEED:
+        await (await session.connection()).exec_driver_sql(statement)
+    await session.commit()
+    await refresh_facets(session)
+    # VACUUM also flushes the GIN pending list, as autovacuum would
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.exec_driver_sql("VACUUM ANALYZE")
+
+    users, books, reviews = UserService(), BookService(), ReviewService()
+    _, books_cursor = await books.find_all(session, 20)
+    _, reviews_cursor = await reviews.get_book_reviews(session, "b7", 1)
+
+    with captured_statements() as statements:
+        await users.get_user_by_email(session, "user7@example.com")
+        await users.get_user_by_id(session, "u7", load_relations=True)
+        await books.find_all(session, 20)
+        await books.find_all(session, 20, books_cursor)
+        await books.find_all(session, 20, fields=("id", "title", "author"))
+        await books.get_user_books(session, "u7", 20)
+        await books.browse(session, 20, language="fr")
+        await books.browse(session, 20, publisher="Publisher 7")
+        await books.browse(session, 20, author="Author 7")
+        await books.search(session, "12345", 20)
+        await books.get_book_by_id(session, "b7", load_reviews=True)
+        await books.get_books_by_ids(session, ["b7", "b8", "b9"])
+        await reviews.get_book_reviews(session, "b7", 20)
+        await reviews.get_book_reviews(session, "b7", 20, reviews_cursor)
+        await reviews.get_book_reviews(session, "b7", 20, sort="rating")
+        await reviews.get_book_reviews(session, "b7", 20, rating=3)
+        await reviews.get_latest_reviews(session, ["b7", "b8", "b9"], 3)
+        await get_facet_counts(session)
+        await get_facet_counts(session, language="fr", decade=2010)
+        await get_facet_counts(session, publisher="Publisher 7", decade=2010)
+        await get_facet_counts(session, language="fr", author="Author 7")
+
+    connection = await session.connection()
+    seq_scans = []
+    for statement, parameters in statements:
+        result = await connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        plan = "\n".join(row[0] for row in result)
+        if SEQ_SCAN.search(plan):
+            seq_scans.append(f"{statement}\n{plan}")
+
+    assert not seq_scans, "sequential scans:\n\n" + "\n\n".join(seq_scans)
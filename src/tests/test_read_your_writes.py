@@ -0,0 +1,71 @@
+from src import app
+from src.db.main import (
+    PRIMARY_UNTIL_COOKIE,
+    ReadYourWritesMiddleware,
+    async_session_maker,
+    replica_router,
+)
+from src.db.replicas import ReplicaRouter
+import httpx
+import pytest
+import time
+
+pytestmark = pytest.mark.anyio
+
+
+class Replica:
+    def __init__(self):
+        self.reads = 0
+
+    def session_maker(self):
+        self.reads += 1
+        return async_session_maker()
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    replica = Replica()
+    monkeypatch.setattr(ReplicaRouter, "enabled", property(lambda self: True))
+    monkeypatch.setattr(replica_router, "pick", lambda: replica)
+
+    return replica
+
+
+@pytest.fixture
+async def client(database):
+    transport = httpx.ASGITransport(app=ReadYourWritesMiddleware(app, seconds=10))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def test_writer_reads_from_primary_until_marker_expires(
+    client, admin_headers, add_books, replica
+):
+    (book,) = await add_books(1)
+    url = f"/api/v1/reviews/book/{book.id}"
+
+    await client.get(url, headers=admin_headers)
+    assert replica.reads == 1
+
+    response = await client.post(
+        url, json={"rating": 3, "review_text": "Fine"}, headers=admin_headers
+    )
+    assert response.status_code == 200, response.text
+    assert PRIMARY_UNTIL_COOKIE in response.cookies
+
+    response = await client.get(url, headers=admin_headers)
+    assert len(response.json()["items"]) == 1
+    assert replica.reads == 1
+
+    # other clients, e.g. behind the same load balancer, keep using replicas
+    client.cookies.clear()
+    await client.get(url, headers=admin_headers)
+    assert replica.reads == 2
+
+
+async def test_forged_marker_is_ignored(client, admin_headers, add_books, replica):
+    (book,) = await add_books(1)
+    client.cookies.set(PRIMARY_UNTIL_COOKIE, str(time.time() + 3600))
+
+    await client.get(f"/api/v1/reviews/book/{book.id}", headers=admin_headers)
+    assert replica.reads == 1
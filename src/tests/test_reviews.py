@@ -0,0 +1,82 @@
+from src.reviews import service
+from src.reviews.schemas import ReviewCreateModel
+from src.reviews.service import ReviewService
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_review_is_kept_when_post_commit_updates_fail(
+    client, admin_headers, add_books, monkeypatch
+):
+    (book,) = await add_books(1)
+
+    async def unavailable(*args):
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(service, "invalidate_book_detail", unavailable)
+
+    response = await client.post(
+        f"/api/v1/reviews/book/{book.id}",
+        json={"rating": 4, "review_text": "Great"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+
+    response = await client.get(
+        f"/api/v1/reviews/book/{book.id}", headers=admin_headers
+    )
+    assert [review["rating"] for review in response.json()["items"]] == [4]
+
+
+async def test_review_refreshes_the_detail_but_keeps_list_pages(
+    client, admin_headers, add_books
+):
+    (book,) = await add_books(1)
+    detail_url = f"/api/v1/books/{book.id}"
+    await client.get("/api/v1/books/", headers=admin_headers)
+    await client.get(detail_url, headers=admin_headers)
+
+    response = await client.post(
+        f"/api/v1/reviews/book/{book.id}",
+        json={"rating": 2, "review_text": "Meh"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+
+    detail = (await client.get(detail_url, headers=admin_headers)).json()
+    assert detail["review_count"] == 1
+    # the cached page keeps its aggregates until BOOK_CACHE_TTL
+    page = (await client.get("/api/v1/books/", headers=admin_headers)).json()
+    assert page["items"][0]["review_count"] == 0
+
+
+async def test_review_updates_the_book_aggregates(session, admin, add_books):
+    (book,) = await add_books(1)
+    review_service = ReviewService()
+
+    for rating in (0, 4, 4):
+        await review_service.add_review_to_book(
+            session, admin.id, book.id, ReviewCreateModel(rating=rating, review_text="")
+        )
+
+    await session.refresh(book)
+    assert book.review_count == 3
+    assert book.rating_sum == 8
+    # rating r is counted in slot r of the zero-indexed histogram
+    assert book.rating_histogram == [1, 0, 0, 0, 2]
+
+
+async def test_reconcile_aggregates_repairs_drifted_books(
+    session, add_books, add_reviews
+):
+    drifted, intact = await add_books(2)
+    # add_reviews inserts rows without touching the aggregates
+    await add_reviews(drifted, 2)
+
+    assert await ReviewService().reconcile_aggregates(session) == [drifted.id]
+
+    await session.refresh(drifted)
+    assert drifted.review_count == 2
+    assert drifted.rating_sum == 1
+    assert drifted.rating_histogram == [1, 1, 0, 0, 0]
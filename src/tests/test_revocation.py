@@ -0,0 +1,88 @@
+from src.db.pubsub import PubSubListener
+from src.db.revocation import RevocationFilter
+import src.db.redis as revocations
+import asyncio
+import pytest
+import time
+
+pytestmark = pytest.mark.anyio
+
+
+async def wait_for(condition, timeout: float = 2) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def revocation_filter(monkeypatch):
+    revocation_filter = RevocationFilter(capacity=1000, error_rate=0.001)
+    monkeypatch.setattr(revocations, "revocation_filter", revocation_filter)
+    monkeypatch.setattr(revocations, "revoked_before", {})
+
+    return revocation_filter
+
+
+@pytest.fixture
+async def listener(monkeypatch, revocation_filter, anyio_backend):
+    listener = PubSubListener()
+    listener.subscribe(revocations.REVOCATION_CHANNEL, revocations._on_revocation)
+    listener.subscribe(
+        revocations.USER_REVOCATION_CHANNEL, revocations._on_user_revocation
+    )
+    listener.on_connect(revocations._on_connect)
+    monkeypatch.setattr(revocations, "pubsub_listener", listener)
+
+    yield listener
+
+    await listener.stop()
+
+
+def token(jti: str) -> dict:
+    now = time.time()
+
+    return {"jti": jti, "user": {"id": "u1"}, "iat": now - 1, "exp": now + 3600}
+
+
+async def test_revocation_during_disconnect_is_rejected_after_reconnect(
+    listener, revocation_filter, monkeypatch
+):
+    await listener.start()
+    await wait_for(lambda: listener.connected and revocation_filter.ready)
+    data = token("j1")
+    assert not await revocations.token_in_blocklist(data)
+
+    await listener.stop()
+    await wait_for(lambda: not listener.connected)
+    # another worker revokes the token while our subscription is down
+    await revocations.redis_client.hset(revocations._bucket_key(data["exp"]), "j1", "")
+
+    scan = revocations._scan_revoked_jtis
+    scan_may_finish = asyncio.Event()
+
+    async def slow_scan():
+        await scan_may_finish.wait()
+        async for jti in scan():
+            yield jti
+
+    monkeypatch.setattr(revocations, "_scan_revoked_jtis", slow_scan)
+    await listener.start()
+    await wait_for(lambda: listener.connected)
+
+    # the rebuild is still scanning
+    assert not revocation_filter.ready
+    assert await revocations.token_in_blocklist(data)
+
+    scan_may_finish.set()
+    await wait_for(lambda: revocation_filter.ready)
+    assert await revocations.token_in_blocklist(data)
+
+
+async def test_own_revocation_echo_is_counted_once(revocation_filter):
+    data = token("j2")
+    await revocations.add_jti_to_blocklist("j2", data["exp"])
+    # the revocation comes back to this worker over pub/sub
+    await revocations._on_revocation("j2")
+
+    assert revocation_filter.stats()["entries"] == 1